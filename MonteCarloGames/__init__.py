@@ -1,7 +1,54 @@
-from .monte_carlo import *
-from .othello import Othello
-from .tic_tac_toe import TicTacToe
+'''
+Monte Carlo tree search for turn based games.
 
-from . import game
+Modules are only imported when one of their names is first used, so that
+processes which only run the search do not pay for importing every game or
+the interactive prompts.
+'''
 
-from .game import GameState, HumanPlayer
+import importlib
+
+# The module each public name is found in
+_exports = {
+    'MonteCarloTree': 'monte_carlo',
+    'MonteCarloPlayer': 'monte_carlo',
+    'Node': 'monte_carlo',
+    'Evaluator': 'evaluator',
+    'MixedEvaluator': 'evaluator',
+    'RolloutEvaluator': 'evaluator',
+    'GameState': 'game',
+    'HumanPlayer': 'game',
+    'Othello': 'othello',
+    'TicTacToe': 'tic_tac_toe',
+    'available_games': 'registry',
+    'get_game': 'registry',
+    'get_options': 'registry',
+    'register_game': 'registry',
+    'TimeManager': 'time_manager',
+    'RandomStream': 'random_streams',
+}
+
+_submodules = ['analysis', 'evaluator', 'game', 'monte_carlo', 'othello',
+               'random_streams', 'registry', 'self_play', 'tic_tac_toe',
+               'time_manager']
+
+__all__ = list(_exports)
+
+
+def __getattr__(name):
+    if name in _exports:
+        value = getattr(importlib.import_module(
+            '.' + _exports[name], __name__), name)
+    elif name in _submodules:
+        value = importlib.import_module('.' + name, __name__)
+    else:
+        raise AttributeError(
+            'module {0!r} has no attribute {1!r}'.format(__name__, name))
+
+    # Cache the name so it is only looked up once
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__ + _submodules)
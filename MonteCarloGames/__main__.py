@@ -2,16 +2,22 @@ import ConsoleQuestionPrompts as questions
 import datetime
 import pickle
 
-from . import *
+from . import game
+from .game import HumanPlayer
+from .monte_carlo import MonteCarloPlayer, MonteCarloTree
+from .registry import available_games, get_game, get_options
 
 file_extension = '.pickle'
 
 
 def main():
-    games = {'Tic Tac Toe': TicTacToe, 'Othello': Othello}
+    games = available_games()
 
-    choice: type = questions.option_question(
-        'Which game would you like to play?', games.keys(), list(games.values()))
+    game_name = questions.option_question(
+        'Which game would you like to play?', games, games)
+
+    # Only the chosen game is imported
+    choice: type = get_game(game_name)
 
     game_types = ['All AI', 'Player vs AI', 'Player vs Player']
     n_humans = questions.option_question('Who will be playing?', game_types)
@@ -23,7 +29,8 @@ def main():
     while len(players) < 2:
         players.append(MonteCarloPlayer)
 
-    played_game = MonteCarloTree(choice, players)
+    # Variants such as the larger Othello boards are listed as games of their own
+    played_game = MonteCarloTree(choice, players, options=get_options(game_name))
 
     rounds = [(0, played_game.current_state)]
     print(played_game.current_state)
@@ -44,7 +51,7 @@ def main():
     if questions.yes_no_question('Save this game? '):
         name = questions.ask_question('Game name: ')
 
-        filename = '-'.join([choice.__name__, name,
+        filename = '-'.join([game_name.replace(' ', ''), name,
                              datetime.datetime.now().strftime('%Y_%m_%d_%H%M')]) + file_extension
 
         with open(filename, mode='wb') as file:
@@ -0,0 +1,298 @@
+'''
+Analyses saved games offline.
+
+Every position of every game saved in a directory is searched again with a
+fixed number of simulations, spread over a pool of worker processes. Each
+move is annotated with the engine's evaluation of it, the best alternative and
+the estimated loss of playing it instead of the best move. Annotated games are
+written out one by one, as soon as all of their positions have been searched.
+
+Searched positions are cached by GameState.key(), so running the analysis
+again over overlapping sets of games only searches the new positions.
+'''
+
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import pickle
+import shelve
+from itertools import repeat
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from .evaluator import Evaluator
+from .game import GameState
+from .monte_carlo import Node
+from .random_streams import RandomStream, keyed_stream
+
+# The extension of the games saved by the command line interface
+file_extension = '.pickle'
+
+
+def load_game(path) -> List[Tuple[object, GameState]]:
+    '''
+    Loads a game saved by the command line interface
+
+    Returns:
+        The list of (move, state) rounds of the game. The first round holds the
+        starting state, with a move of 0.
+    '''
+
+    with open(path, mode='rb') as file:
+        return pickle.load(file)
+
+
+def search_position(state: GameState, simulations=1000, evaluator: Evaluator = None,
+                    rng: RandomStream = None) -> Dict[str, Dict[int, float]]:
+    '''
+    Searches a single position
+
+    Arguments:
+
+        state       The game state to search
+
+        simulations The number of simulations to run
+
+        evaluator   Scores leaf states instead of playing them out. Optional.
+
+        rng         The random stream the search draws from. Optional.
+
+    Returns:
+        A dictionary with the win rate ('values') and number of simulations
+        ('visits') of each move explored, by its integer action
+    '''
+
+    node = Node(state)
+    node.get_move(evaluator, simulations=simulations, rng=rng)
+
+    return {'values': {child.action: float(child.win_rate())
+                       for child in node.children if child.total > 0},
+            'visits': {child.action: child.total for child in node.children}}
+
+
+def _search_position(arguments):
+    '''
+    Unpacks the arguments of search_position() for the worker processes
+    '''
+
+    return search_position(*arguments)
+
+
+def describe(evaluator: Evaluator) -> str:
+    '''
+    Returns a description of an evaluator and its parameters, e.g.
+    'PositionalEvaluator(mobility_weight=1.0, position_weight=2.0)', which is
+    the same for evaluators that score states the same way
+    '''
+
+    if evaluator is None:
+        return 'None'
+
+    parameters = ', '.join(
+        '{0}={1}'.format(name, describe(value) if isinstance(value, Evaluator) else repr(value))
+        for name, value in sorted(vars(evaluator).items()))
+
+    return '{0}({1})'.format(type(evaluator).__name__, parameters)
+
+
+def annotate(rounds, results: Dict[str, dict], suffix='') -> List[dict]:
+    '''
+    Annotates every move of a game with the results of searching the position
+    it was played from. The best move is the one the search explored most, as
+    the win rates of barely explored moves are mostly noise.
+
+    Arguments:
+
+        rounds      The (move, state) rounds of the game, as given by
+                    load_game()
+
+        results     The search results of the positions, by their key, as
+                    given by search_position()
+
+        suffix      Added to the key of each position to find its results
+
+    Returns:
+        A list with a dictionary for each move
+    '''
+
+    annotations = []
+
+    for ply in range(1, len(rounds)):
+        state = rounds[ply - 1][1]
+        action = state.encode_move(rounds[ply][0])
+        values = results[state.key() + suffix]['values']
+        visits = results[state.key() + suffix]['visits']
+
+        annotation = {'ply': ply,
+                      'side': str(state.get_current_turn()),
+                      'move': state.decode_move(action),
+                      'value': values.get(action),
+                      'best_move': None,
+                      'best_value': None,
+                      'loss': None}
+
+        if len(values) > 0:
+            best = max(values, key=lambda action: (visits[action], values[action]))
+
+            annotation['best_move'] = state.decode_move(best)
+            annotation['best_value'] = values[best]
+
+            if annotation['value'] is not None:
+                annotation['loss'] = max(values[best] - annotation['value'], 0)
+
+        annotations.append(annotation)
+
+    return annotations
+
+
+def annotate_games(paths: List[str], simulations=1000, evaluator: Evaluator = None,
+                   workers=None, cache=None, seed=None) -> Iterator[Tuple[str, List[dict]]]:
+    '''
+    Searches every position of the given saved games in parallel worker
+    processes, yielding each game's annotations as soon as all of its positions
+    have been searched
+
+    Arguments:
+
+        paths       The paths of the saved games
+
+        simulations The number of simulations run on each position
+
+        evaluator   Scores leaf states instead of playing them out. Optional.
+
+        workers     The number of worker processes. Defaults to the number
+                    of CPUs
+
+        cache       A dictionary-like cache of search results by position
+                    key, e.g. a shelf, shared between runs. Optional.
+
+        seed        The seed of the random streams of the searched positions.
+                    Each position's stream depends only on the seed and the
+                    position, so a position is searched the same way whatever
+                    is already cached. Random if None.
+
+    Yields:
+        The path and the annotations of each game, in order
+    '''
+
+    if cache is None:
+        cache = {}
+
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+
+    # Positions searched with a different budget or evaluator are not reused
+    suffix = '-{0}-{1}'.format(simulations, describe(evaluator))
+
+    games = [load_game(path) for path in paths]
+
+    # Find the positions that have not been searched before, each only once,
+    # in the order the games need them
+    pending = {}
+    for rounds in games:
+        for _, state in rounds[:-1]:
+            key = state.key() + suffix
+
+            if key not in cache and key not in pending:
+                pending[key] = state
+
+    # Each game's positions, so it can be written once they are all searched
+    needed = [{state.key() + suffix for _, state in rounds[:-1]}
+              for rounds in games]
+
+    done = 0
+
+    def finished():
+        return all(key in cache for key in needed[done])
+
+    with multiprocessing.Pool(workers) as pool:
+        searches = pool.imap(_search_position,
+                             zip(pending.values(), repeat(simulations), repeat(evaluator),
+                                 (keyed_stream(seed, state.key()) for state in pending.values())))
+
+        for key, result in zip(pending.keys(), searches):
+            cache[key] = result
+
+            # Write out every game that can be annotated now
+            while done < len(games) and finished():
+                yield paths[done], annotate(games[done], cache, suffix)
+                done += 1
+
+    # Games whose positions were all cached already
+    while done < len(games):
+        yield paths[done], annotate(games[done], cache, suffix)
+        done += 1
+
+
+def analyse(directory, output, simulations=1000, evaluator: Evaluator = None,
+            workers=None, cache_path=None, seed=None) -> int:
+    '''
+    Analyses every game saved in a directory, writing one JSON line per game
+    to the output file as soon as it has been annotated
+
+    Arguments:
+
+        directory   The directory of the saved games
+
+        output      The path of the JSON lines file written
+
+        simulations The number of simulations run on each position
+
+        evaluator   Scores leaf states instead of playing them out. Optional.
+
+        workers     The number of worker processes. Defaults to the number
+                    of CPUs
+
+        cache_path  Where to keep the cache of searched positions between
+                    runs. Defaults to a cache in the games' directory.
+
+        seed        The seed of the searches' random streams. Random if None.
+
+    Returns:
+        The number of games analysed
+    '''
+
+    paths = sorted(glob.glob(os.path.join(directory, '*' + file_extension)))
+
+    if cache_path is None:
+        cache_path = os.path.join(directory, 'analysis_cache')
+
+    count = 0
+
+    with shelve.open(cache_path) as cache, open(output, mode='w', encoding='utf-8') as file:
+        for path, annotations in annotate_games(paths, simulations, evaluator,
+                                                workers, cache, seed):
+            file.write(json.dumps({'game': os.path.basename(path),
+                                   'moves': annotations}, ensure_ascii=False) + '\n')
+            file.flush()
+
+            count += 1
+
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Analyse saved games')
+    parser.add_argument('directory', help='The directory of the saved games')
+    parser.add_argument('output', help='The JSON lines file to write')
+    parser.add_argument('-s', '--simulations', type=int, default=1000)
+    parser.add_argument('-w', '--workers', type=int, default=None)
+    parser.add_argument('--cache', default=None,
+                        help='Where to cache searched positions between runs')
+    parser.add_argument('--seed', type=int, default=None)
+    arguments = parser.parse_args()
+
+    count = analyse(arguments.directory, arguments.output,
+                    simulations=arguments.simulations, workers=arguments.workers,
+                    cache_path=arguments.cache, seed=arguments.seed)
+
+    print('Analysed', count, 'games')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import List
+
+import numpy as np
+
+from . import game
+from .game import GameState
+from .random_streams import RandomStream, as_stream
+
+
+class Evaluator(ABC):
+    '''
+    Scores leaf game states for the Monte Carlo search so that a leaf does not
+    have to be played out all the way to the end of the game.
+
+    States are always handed over in batches so that an evaluator can score
+    them all at once, for example with a single vectorized NumPy call.
+    '''
+
+    @abstractmethod
+    def evaluate(self, states: List[GameState], rng: RandomStream = None):
+        '''
+        Scores a batch of unfinished game states
+
+        Arguments:
+
+            states      The list of game states to score
+
+            rng         The random stream of the search, for evaluators which
+                        need random numbers. Optional.
+
+        Returns:
+            A tuple (values, priors). values is an array with, for each state,
+            the expected score between 0 (loss) and 1 (win) of the player whose
+            turn it is in that state. priors is either None or an array with a
+            row for each state, giving the prior probability of each integer
+            action (see GameState.encode_move()) being a good move for the
+            player whose turn it is.
+        '''
+
+        pass
+
+
+class RolloutEvaluator(Evaluator):
+    '''
+    Scores states the classic Monte Carlo way, by playing random moves until
+    the game is finished.
+    '''
+
+    def __init__(self, playouts=1):
+        '''
+        Arguments:
+
+            playouts    The number of random games played from each state
+        '''
+
+        self.playouts = playouts
+
+    def evaluate(self, states: List[GameState], rng: RandomStream = None):
+        values = np.zeros(len(states))
+
+        for i, state in enumerate(states):
+            side = state.get_current_turn()
+
+            for _ in range(self.playouts):
+                values[i] += score(rollout(state, rng), side)
+
+        return values / self.playouts, None
+
+
+class MixedEvaluator(Evaluator):
+    '''
+    Blends the values of two evaluators, e.g. a fast heuristic evaluator
+    together with random rollouts.
+    '''
+
+    def __init__(self, first: Evaluator, second: Evaluator, mix=0.5):
+        '''
+        Arguments:
+
+            first       The evaluator whose priors are used, if it has any
+
+            second      The evaluator blended in with the first
+
+            mix         The weight between 0 and 1 given to the second evaluator
+        '''
+
+        self.first = first
+        self.second = second
+        self.mix = mix
+
+    def evaluate(self, states: List[GameState], rng: RandomStream = None):
+        first_values, first_priors = self.first.evaluate(states, rng)
+        second_values, second_priors = self.second.evaluate(states, rng)
+
+        values = (1 - self.mix) * first_values + self.mix * second_values
+
+        return values, first_priors if first_priors is not None else second_priors
+
+
+def rollout(state: GameState, rng: RandomStream = None):
+    '''
+    Plays uniformly random moves from the given state until the game is
+    finished and returns the winner
+
+    Arguments:
+
+        state       The state to play out
+
+        rng         The random stream to draw from. Optional.
+    '''
+
+    rng = as_stream(rng)
+
+    while not state.is_finished():
+        side = state.get_current_turn()
+        moves = state.get_possible_moves(side)
+        state = state.move(side, moves[rng.integer(len(moves))])
+
+    return state.get_winner()
+
+
+def score(winner, side):
+    '''
+    Returns the score of a finished game for the given side: 1 for a win, 0.5
+    for a draw and 0 for a loss
+    '''
+
+    return int(winner == side) + 0.5 * int(winner == game.TIE)
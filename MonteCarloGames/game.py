@@ -1,12 +1,11 @@
 # Allow recursive annotations. Sucks this isn't default until 3.10
 from __future__ import annotations
 
+import hashlib
 from abc import ABC, abstractmethod, abstractstaticmethod
 
 import numpy
 
-import ConsoleQuestionPrompts as questions
-
 TIE = DRAW = 'DRAW'
 
 
@@ -21,6 +20,9 @@ class Player:
 
 class HumanPlayer(Player):
     def get_move(self, possible_moves):
+        # Only needed when a person is playing, so keep it out of the search
+        import ConsoleQuestionPrompts as questions
+
         return questions.ask_question(prompt='It is {0}\'s turn. What is your move? '.format(self.side),
                                       in_bounds=lambda move: move in possible_moves,
                                       cast=self.user_input_cast,
@@ -33,6 +35,9 @@ class GameState(ABC):
     time
     '''
 
+    # The players of the game in a fixed order, regardless of whose turn it is
+    sides = ()
+
     @abstractstaticmethod
     def parse_user_input():
         pass
@@ -86,6 +91,101 @@ class GameState(ABC):
 
         pass
 
+    @property
+    @abstractmethod
+    def action_size(self) -> int:
+        '''
+        The number of actions in the game's action space. Every move that could
+        ever be made in the game is numbered by an integer action between 0 and
+        action_size - 1.
+        '''
+
+        pass
+
+    @abstractmethod
+    def encode_move(self, move) -> int:
+        '''
+        Returns the integer action representing the given move
+
+        Arguments:
+
+            move        A move as given by get_possible_moves()
+        '''
+
+        pass
+
+    @abstractmethod
+    def decode_move(self, action: int):
+        '''
+        Returns the move represented by the given integer action
+
+        Arguments:
+
+            action      An integer between 0 and action_size - 1
+        '''
+
+        pass
+
+    def legal_mask(self, player) -> numpy.ndarray:
+        '''
+        Returns an array of booleans, one for each action in the action space,
+        which are True where the action is a move available to the given player
+
+        Arguments:
+
+            player      The player who wants to make a move
+        '''
+
+        mask = numpy.zeros(self.action_size, dtype=bool)
+
+        for move in self.get_possible_moves(player):
+            mask[self.encode_move(move)] = True
+
+        return mask
+
+    def play(self, action: int) -> GameState:
+        '''
+        Advances the game state by making the move represented by the given
+        integer action for the player whose turn it is
+
+        Arguments:
+
+            action      The integer action of the move
+
+        Returns:
+            The new game state
+        '''
+
+        return self.move(self.get_current_turn(), self.decode_move(action))
+
+    def encode_board(self) -> numpy.ndarray:
+        '''
+        Returns the board of a two player game as an array of small integers,
+        suitable for storing or training on: 1 where a square is held by the
+        first of the game's sides, -1 where it is held by the second and 0
+        elsewhere
+        '''
+
+        board = numpy.asarray(self.get_state())
+
+        return numpy.select([board == self.sides[0], board == self.sides[1]],
+                            [1, -1], 0).astype(numpy.int8)
+
+    def key(self) -> str:
+        '''
+        Returns a string identifying this game state, which is the same for
+        any two states with the same board and the same player to move
+        '''
+
+        board = numpy.asarray(self.get_state())
+
+        digest = hashlib.sha1(type(self).__name__.encode())
+        digest.update(str(self.get_current_turn()).encode())
+        digest.update(str(board.shape).encode())
+        digest.update(board.tobytes())
+
+        return digest.hexdigest()
+
     @abstractmethod
     def get_winner(self):
         '''
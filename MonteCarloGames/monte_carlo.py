@@ -1,31 +1,65 @@
 from __future__ import annotations
 
 import datetime
-from typing import List
+from typing import Dict, List, Tuple
 
 import numpy as np
-import numpy.random as rng
 
 from . import game
+from .evaluator import Evaluator, score
 from .game import GameState
 from .game import Player
-
-# Ignore NumPy warnings: namely divide by zero warnings
-np.warnings.filterwarnings('ignore')
+from .random_streams import RandomStream, as_stream
+from .time_manager import TimeManager
 
 # The time allowed for the Monte Carlo Tree to explore new game states
 decision_time = datetime.timedelta(seconds=2)
 
+# The number of leaf states collected before they are scored together by an
+# evaluator
+batch_size = 16
+
+# How strongly the prior probabilities given by an evaluator steer the search
+# towards a move before it has been explored much
+prior_weight = 1.0
+
+# The number of simulations at which a node's own win rate and its
+# All-Moves-As-First (RAVE) win rate are weighted equally during selection.
+# Larger values lean on the RAVE statistics for longer. 0 disables RAVE.
+rave_equivalence = 0
+
+# Progressive widening: a node simulated n times only considers its first
+# ceil(widening_constant * n ** widening_exponent) children. None considers
+# every legal move.
+widening_constant = None
+widening_exponent = 0.5
+
 # The function into which a gamestate can be passed to determine the winner
 # TODO This is horrible, make this better
 get_winner = None
 
 
 class MonteCarloTree:
-    def __init__(self, game: game.GameState, players):
-        self.root_node = Node(game())
+    def __init__(self, game: game.GameState, players, evaluator: Evaluator = None,
+                 time_control: Tuple[datetime.timedelta, datetime.timedelta] = None,
+                 rng=None, options: dict = None):
+        # The options are passed on to create the starting state, e.g. the
+        # board size of a game of Othello
+        self.root_node = Node(game(**(options or {})))
         self.current_node = self.root_node
 
+        # Scores leaf states during the search. Leaves are played out to the
+        # end of the game if there is no evaluator
+        self.evaluator = evaluator
+
+        # The (total, increment) clock each player gets for the whole game. If
+        # None, every move is searched for the module-level decision_time
+        self.time_control = time_control
+
+        # The random stream used by every search in this game: a RandomStream,
+        # a numpy.random.Generator, a seed, or None for the shared default
+        self.rng = as_stream(rng)
+
         self.players = {}
 
         for i, side in enumerate(self.current_state.players):
@@ -54,11 +88,22 @@ class MonteCarloPlayer(Player):
     def __init__(self, side, game_tree, user_input_cast: function = None):
         self.game_tree = game_tree
 
+        # Share out the game clock between moves, if there is one
+        self.time_manager = None
+        if game_tree.time_control is not None:
+            self.time_manager = TimeManager(*game_tree.time_control)
+
     def get_move(self, possible_moves):
         print('Thinking...')
         # print(len(self.curr_node.children))
         try:
-            return self.game_tree.current_node.get_move()
+            if self.time_manager is not None:
+                return self.time_manager.get_move(self.game_tree.current_node,
+                                                  self.game_tree.evaluator,
+                                                  rng=self.game_tree.rng)
+
+            return self.game_tree.current_node.get_move(self.game_tree.evaluator,
+                                                        rng=self.game_tree.rng)
         except RuntimeWarning:
             pass
 
@@ -70,7 +115,7 @@ class Node:
     played to reach this game state.
     """
 
-    def __init__(self, state: GameState, side=None, prev_move=None):
+    def __init__(self, state: GameState, side=None, prev_move=None, action=None):
         """
         Creates the Monte Carlo Node.
 
@@ -81,6 +126,9 @@ class Node:
             state       The current state of the game represented by this node
 
             prev_move   The action or 'move' taken to get to this state.
+
+            action      The integer action of prev_move, as given by
+                        GameState.encode_move()
         """
 
         self.state = state
@@ -89,17 +137,70 @@ class Node:
         self.wins = 0
         self.total = 0
 
+        # All-Moves-As-First statistics: the results of every simulation in
+        # which this node's move was played by the same side at any later point,
+        # not just directly from the parent state
+        self.amaf_wins = 0
+        self.amaf_total = 0
+
+        # The All-Moves-As-First statistics of every action from this state,
+        # including the moves that have no child yet, so that new children
+        # start out with them. None until the first result is recorded
+        self.action_amaf_wins = None
+        self.action_amaf_total = None
+
         self.__previous_move = prev_move
+        self.action = action
 
         self.children: List(Node) = []
 
+        # The same children, looked up by the integer action reaching them
+        self.children_by_action: Dict[int, Node] = {}
+
+        # The integer actions of the legal moves from this state that do not
+        # have a child yet. None until the node is expanded for the first time
+        self.untried_actions = None
+
+        # The prior probability, given by an evaluator, that the move to reach
+        # this state is a good one. None if the state has not been evaluated
+        self.prior = None
+
+        # The prior probabilities of each action from this state, given by an
+        # evaluator, waiting to be handed to the children once they exist
+        self.move_priors = None
+
     def win_rate(self):
         '''
         Returns the probability of winning for the player that made the move to
         get to this game state.
         '''
 
-        return np.divide(self.wins, self.total)
+        # Unexplored nodes have an undefined win rate
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.divide(self.wins, self.total)
+
+    def value(self):
+        '''
+        Returns the estimated probability of winning used to choose which
+        branches to explore. When RAVE is enabled, the win rate is blended with
+        the All-Moves-As-First win rate, which is relied on less as the node is
+        simulated more often. A node that has not been simulated yet is valued
+        by its All-Moves-As-First win rate alone.
+        '''
+
+        if rave_equivalence <= 0 or self.amaf_total == 0:
+            return self.win_rate()
+
+        amaf_rate = self.amaf_wins / self.amaf_total
+
+        # There is no win rate to blend with yet
+        if self.total == 0:
+            return amaf_rate
+
+        beta = np.sqrt(rave_equivalence /
+                       (3 * self.total + rave_equivalence))
+
+        return (1 - beta) * self.win_rate() + beta * amaf_rate
 
     def next_state(self, move, side):
         '''
@@ -118,10 +219,15 @@ class Node:
         # Expand the game-state tree if necessary
         self.expand()
 
+        action = self.state.encode_move(move)
+
         # Return the game state reached by move
-        for next_state in self.children:
-            if next_state.previous_move == move:
-                return next_state
+        if action in self.children_by_action:
+            return self.children_by_action[action]
+
+        # Create the game state if no simulation has reached it yet
+        if self.state.legal_mask(side)[action]:
+            return self.add_child(action)
 
     @ property
     def previous_move(self):
@@ -134,10 +240,20 @@ class Node:
         explored during simulations
         '''
 
-        return self.win_rate() + exploration_param * \
-            np.sqrt(np.divide(np.log(parent_node_explored), self.total))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weight = self.value() + exploration_param * \
+                np.sqrt(np.divide(np.log(parent_node_explored), self.total))
+
+        # Progressive bias: favor moves the evaluator likes while they have
+        # been explored only a little
+        if self.prior is not None:
+            weight += prior_weight * self.prior / (self.total + 1)
+
+        return weight
 
-    def get_move(self):
+    def get_move(self, evaluator: Evaluator = None, simulations: int = None,
+                 time_limit: datetime.timedelta = None, should_stop=None, rng=None,
+                 by_visits=False):
         '''
         Determines the move where the player who makes it has the highest
         probability of winning. Note that the player or side making this move is
@@ -145,6 +261,30 @@ class Node:
         players, the player contained in this node is the player who has just
         made a move.
 
+        Arguments:
+
+            evaluator   Scores leaf states in batches instead of playing them
+                        out to the end of the game. Optional.
+
+            simulations The number of simulations to run before deciding,
+                        instead of searching for the module-level
+                        decision_time. Optional.
+
+            time_limit  How long to search for instead of the module-level
+                        decision_time. Optional.
+
+            should_stop A function given the time spent searching so far,
+                        returning True to stop searching early. Optional.
+
+            rng         The random stream (or numpy.random.Generator or seed)
+                        the simulations draw from. Optional.
+
+            by_visits   Choose the most explored move instead of the one with
+                        the highest win rate, which can be a barely explored
+                        move that got lucky. Use this with a should_stop based
+                        on the visits, so that stopping once the most explored
+                        move cannot be caught up decides the move.
+
         Returns:
             The optimal move estimated by Monte Carlo sampling or
             None if a move cannot be made
@@ -154,49 +294,203 @@ class Node:
         if self.state.is_finished():
             return
 
-        # If there are no game states simulated after the current one, create them
+        # Find the moves that can be made from this game state
         self.expand()
 
         # Simulate moves as long as there is more than one option
-        if len(self.children) > 1:
+        if len(self.children) + len(self.untried_actions) > 1:
+            rng = as_stream(rng)
             begin = datetime.datetime.now()
-            while datetime.datetime.now() - begin < decision_time:
-                self.explore()
+            target = None if simulations is None else self.total + simulations
+            time_limit = decision_time if time_limit is None else time_limit
+
+            while datetime.datetime.now() - begin < time_limit if target is None \
+                    else self.total < target:
+                if should_stop is not None and should_stop(datetime.datetime.now() - begin):
+                    break
+
+                if evaluator is None:
+                    self.explore(rng=rng)
+                else:
+                    self.explore_batch(evaluator, rng=rng)
 
         # Sort the possible moves by their likelyhood of leading to a win
-        def sort_key(node): return node.win_rate() \
-            if not np.isnan(node.win_rate()) else 0
+        def sort_key(node):
+            win_rate = node.win_rate() if not np.isnan(node.win_rate()) else 0
+            return (node.total, win_rate) if by_visits else win_rate
 
         # for c in self.children:
         #     print(c.previous_move, c.win_rate())
 
+        # Make sure there is a move to return even if no simulation was run
+        if len(self.children) == 0:
+            self.add_child(self.untried_actions[0])
+
         self.children.sort(key=sort_key, reverse=True)
 
         # Return the move with the highest likelyhood of leading to a win
         return self.children[0].previous_move
 
+    def visit_distribution(self) -> np.ndarray:
+        '''
+        Returns how often each action from this game state was explored, as a
+        fraction of all the simulations run on the children. If no simulation
+        has been run, the legal actions share equally.
+        '''
+
+        visits = np.zeros(self.state.action_size, dtype=np.float32)
+
+        for child in self.children:
+            visits[child.action] = child.total
+
+        if visits.sum() == 0:
+            visits[self.state.legal_mask(self.state.get_current_turn())] = 1
+
+        return visits / max(visits.sum(), 1)
+
     def expand(self):
         '''
-        Adds children as possible game states resulting from moves made from the
-        current game state but does not simulate the probabilities of winning
-        for these moves.
+        Finds the moves that can be made from the current game state. The game
+        states resulting from these moves are only created by add_child() once
+        a simulation chooses to explore them.
         '''
 
-        if len(self.children) == 0:
-            # Add a move for each open board position
-            for move in self.state.get_possible_moves(self.state.get_current_turn()):
-                new_state = self.state.move(
-                    self.state.get_current_turn(), move)
-                new_node = Node(
-                    new_state, side=self.state.get_current_turn(), prev_move=move)
-                self.children.append(new_node)
+        if self.untried_actions is None:
+            self.untried_actions = np.flatnonzero(self.state.legal_mask(
+                self.state.get_current_turn())).tolist()
+
+    def add_child(self, action: int) -> Node:
+        '''
+        Creates the node for the game state reached by making the given untried
+        move from this game state
+
+        Arguments:
+
+            action      The integer action of one of the untried moves of this
+                        node
+
+        Returns:
+            The new child node
+        '''
+
+        self.untried_actions.remove(action)
+
+        move = self.state.decode_move(action)
+        new_state = self.state.move(self.state.get_current_turn(), move)
+        new_node = Node(new_state, side=self.state.get_current_turn(),
+                        prev_move=move, action=action)
+
+        if self.move_priors is not None:
+            new_node.prior = self.move_priors[action]
+
+        if self.action_amaf_total is not None:
+            new_node.amaf_wins = float(self.action_amaf_wins[action])
+            new_node.amaf_total = int(self.action_amaf_total[action])
+
+        self.children.append(new_node)
+        self.children_by_action[action] = new_node
+
+        return new_node
+
+    def max_children(self):
+        '''
+        Returns how many children may be explored from this node with
+        progressive widening, based on the number of simulations run on it
+        '''
+
+        if widening_constant is None:
+            return np.inf
+
+        return np.ceil(widening_constant * self.total ** widening_exponent)
+
+    def choose_child(self, rng: RandomStream = None) -> Node:
+        '''
+        Chooses the branch a simulation explores next. Untried moves are tried
+        first, as long as progressive widening allows another child, preferring
+        the move the evaluator likes most if there are priors, or else the move
+        with the best All-Moves-As-First win rate if RAVE is enabled.
+        Otherwise, a child is chosen weighted by its priority.
+
+        Arguments:
+
+            rng         The random stream to draw from. Optional.
+        '''
+
+        rng = as_stream(rng)
+
+        # If there aren't any simulated moves beyond this one, generate them
+        self.expand()
+
+        if len(self.untried_actions) > 0 and \
+                (len(self.children) < self.max_children() or len(self.children) == 0):
+            if self.move_priors is not None:
+                action = self.untried_actions[np.argmax(
+                    self.move_priors[self.untried_actions])]
+            elif rave_equivalence > 0 and self.action_amaf_total is not None:
+                totals = self.action_amaf_total[self.untried_actions]
+                wins = self.action_amaf_wins[self.untried_actions]
+
+                # Moves never played count as even
+                rates = np.where(totals > 0, wins / np.maximum(totals, 1), 0.5)
+                best = np.flatnonzero(rates == rates.max())
+
+                action = self.untried_actions[best[rng.integer(len(best))]]
+            else:
+                action = self.untried_actions[rng.integer(
+                    len(self.untried_actions))]
+
+            return self.add_child(action)
+
+        unvisited = np.array([child.total == 0 for child in self.children])
+
+        # If there are any unsimulated branches, only choose among them,
+        # preferring those the evaluator likes. With RAVE, only those which
+        # did best when played later in other simulations are chosen from,
+        # counting moves never played as even.
+        if np.any(unvisited):
+            if rave_equivalence > 0:
+                rates = np.array([child.value() if child.amaf_total > 0 else 0.5
+                                  for child in self.children])
+                unvisited &= rates == rates[unvisited].max()
+
+            priors = [1 if child.prior is None else child.prior + 1e-3
+                      for child in self.children]
+            weights = np.where(unvisited, priors, 0)
+        else:
+            weights = Node.weight(self.children, self.total)
+
+        # Choose a branch to explore weighted by their priority
+        return self.children[rng.weighted(weights)]
+
+    def share_priors(self):
+        '''
+        Hands the prior probabilities of the moves from this state down to the
+        children that already exist. Children created later receive theirs in
+        add_child().
+        '''
+
+        if self.move_priors is not None:
+            for child in self.children:
+                child.prior = self.move_priors[child.action]
 
-    def explore(self):
+    def explore(self, played: set = None, rng: RandomStream = None):
         '''
         Randomly samples win states for moves made branching from this game
         state (Monte Carlo Method).
+
+        Arguments:
+
+            played      Collects the (side, action) pairs played from this
+                        state onwards, for the RAVE statistics. Optional.
+
+            rng         The random stream to draw from. Optional.
         '''
 
+        if played is None:
+            played = set()
+
+        rng = as_stream(rng)
+
         self.total += 1  # Increment total number of simulations on this node
 
         winner = None
@@ -206,23 +500,162 @@ class Node:
             winner = self.state.get_winner()
         else:  # Recursive case
 
-            # If there aren't any simulated moves beyond this one, generate them
-            self.expand()
-
             # Choose the node to explore
-            weights = Node.weight(self.children, self.total)
-
-            # If there are any unsimulated branches, only choose among them
-            if np.any(np.isnan(weights)):
-                weights[~np.isnan(weights)] = 0
-                weights[np.isnan(weights)] = 1
-
-            # Choose a branch to explore weighted by their priority
-            node = rng.choice(self.children, p=weights/weights.sum())
+            node = self.choose_child(rng)
 
             # explore node
-            winner = node.explore()
+            winner = node.explore(played, rng)
+
+            if rave_equivalence > 0:
+                played.add((node.side, node.action))
+                self.record_amaf(played, lambda side: score(winner, side))
 
         # Record result (for both the base case and the recursive case)
-        self.wins += int(winner == self.side) + 0.5 * int(winner == game.TIE)
+        self.wins += score(winner, self.side)
         return winner  # Return the winner so higher up nodes can record their win_rate
+
+    def select(self, rng: RandomStream = None):
+        '''
+        Walks down the tree from this node, choosing branches the same way as
+        explore(), until reaching a state that has not been scored yet or a
+        finished game.
+
+        Every node on the way is counted as visited straight away, so that the
+        next selection of the same batch is steered towards other branches
+        (a 'virtual loss'), until the result is recorded by backpropagate().
+
+        Arguments:
+
+            rng         The random stream to draw from. Optional.
+
+        Returns:
+            The list of nodes visited, starting with this one
+        '''
+
+        rng = as_stream(rng)
+
+        node = self
+        path = [node]
+
+        # Stop at the first state that has never been scored
+        while node.total > 0 and not node.state.is_finished():
+            node.total += 1
+
+            node = node.choose_child(rng)
+            path.append(node)
+
+        node.total += 1
+
+        return path
+
+    def record_amaf(self, played: set, credit):
+        '''
+        Updates the All-Moves-As-First statistics of the moves from this
+        state which were played by the same side at some point of a
+        simulation, whether or not they have a child yet
+
+        Arguments:
+
+            played      The (side, action) pairs played from this state
+                        onwards during the simulation
+
+            credit      A function giving the score of the simulation for a
+                        side
+        '''
+
+        turn = self.state.get_current_turn()
+        actions = [action for side, action in played if side == turn]
+
+        if len(actions) == 0:
+            return
+
+        if self.action_amaf_total is None:
+            self.action_amaf_wins = np.zeros(self.state.action_size)
+            self.action_amaf_total = np.zeros(self.state.action_size, dtype=int)
+
+        result = credit(turn)
+
+        self.action_amaf_wins[actions] += result
+        self.action_amaf_total[actions] += 1
+
+        for action in actions:
+            if action in self.children_by_action:
+                child = self.children_by_action[action]
+                child.amaf_total += 1
+                child.amaf_wins += result
+
+    def explore_batch(self, evaluator: Evaluator, size=None, rng: RandomStream = None):
+        '''
+        Runs a batch of simulations from this game state. Instead of playing
+        out the leaf states reached by each simulation, they are collected and
+        scored together by the evaluator.
+
+        Arguments:
+
+            evaluator   Scores the leaf states of the simulations
+
+            size        The number of simulations in the batch. Defaults to the
+                        module-level batch_size
+
+            rng         The random stream to draw from, also handed to the
+                        evaluator. Optional.
+        '''
+
+        rng = as_stream(rng)
+
+        paths = [self.select(rng) for _ in range(size or batch_size)]
+
+        # Collect each unfinished leaf only once, even if several simulations
+        # reached it
+        leaves = list({id(path[-1]): path[-1] for path in paths
+                       if not path[-1].state.is_finished()}.values())
+
+        values = {}
+        if len(leaves) > 0:
+            scores, priors = evaluator.evaluate([leaf.state for leaf in leaves], rng)
+
+            for i, leaf in enumerate(leaves):
+                values[id(leaf)] = scores[i]
+
+                if priors is not None:
+                    leaf.move_priors = priors[i]
+                    leaf.share_priors()
+
+        for path in paths:
+            leaf = path[-1]
+
+            if leaf.state.is_finished():
+                winner = leaf.state.get_winner()
+
+                def credit(side): return score(winner, side)
+            else:
+                value = values[id(leaf)]
+                turn = leaf.state.get_current_turn()
+
+                def credit(side): return value if side == turn else 1 - value
+
+            Node.backpropagate(path, credit)
+
+    @staticmethod
+    def backpropagate(path: List[Node], credit):
+        '''
+        Records the result of a simulation on every node along its path
+
+        Arguments:
+
+            path        The nodes visited by the simulation, as given by select()
+
+            credit      A function giving the score between 0 and 1 reached by
+                        the simulation for a side
+        '''
+
+        for node in path:
+            if node.side is not None:
+                node.wins += credit(node.side)
+
+        if rave_equivalence > 0:
+            # Each node learns about the moves played below it
+            played = set()
+            for parent, child in reversed(list(zip(path, path[1:]))):
+                played.add((child.side, child.action))
+                parent.record_amaf(played, credit)
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+from functools import lru_cache
+from typing import List
+
 import numpy as np
 
 from . import game
-
-from . import monte_carlo
+from .evaluator import Evaluator
 
 LIGHT = '\u25CF'  # '\u26AA'
 DARK = '\u25CB'  # '\u26AB'
@@ -27,27 +29,58 @@ class Othello(game.GameState):
     @staticmethod
     def parse_user_input(response: str):
         try:
-            coord = (ord(response[0].upper()) - 65, int(response[1]) - 1)
+            coord = (ord(response[0].upper()) - 65, int(response[1:]) - 1)
             print(coord)
             return coord
         except:
             return None
 
-    def __init__(self, board=None, turn=None):
-        shape = (8, 8)  # Create the shape of the board
+    sides = (DARK, LIGHT)
+
+    def __init__(self, board=None, turn=None, size=8, frontier=None):
+        '''
+        Arguments:
+
+            board       The board to continue a game from. A new game is
+                        started if None.
 
-        self.players = [DARK, LIGHT]  # Identify the players
+            turn        The player whose turn it is. Defaults to dark.
+
+            size        The width and height of the board of a new game. Must
+                        be even, between 4 and 26.
+
+            frontier    The set of empty squares next to an occupied square,
+                        if already known. Worked out from the board if None.
+        '''
+
+        self.players = list(self.sides)  # Identify the players
+
+        # The legal moves already worked out for each player, whether or not
+        # it is their turn
+        self.__moves = {}
+
+        # The legal move masks already worked out for each player
+        self.__legal_masks = {}
+
+        # The board as nested lists, created when first searched for moves
+        self.__rows = None
 
         if board is None:
+            # Make sure the board can be set up and labelled
+            if size % 2 != 0 or not 4 <= size <= 26:
+                raise ValueError(size, 'Invalid board size')
+
             # Create the board
-            self.board = np.full(shape, EMPTY, dtype=str, order='F')
+            self.board = np.full((size, size), EMPTY, dtype=str, order='F')
+
+            # Place the starting pieces in the middle of the board
+            middle = size // 2
 
-            # Place the starting pieces
-            self.board[3][3] = DARK
-            self.board[4][4] = DARK
+            self.board[middle - 1][middle - 1] = DARK
+            self.board[middle][middle] = DARK
 
-            self.board[3][4] = LIGHT
-            self.board[4][3] = LIGHT
+            self.board[middle - 1][middle] = LIGHT
+            self.board[middle][middle - 1] = LIGHT
 
             # Orientation Debug
             # self.board[0][0] = DARK  # Bottom left
@@ -57,6 +90,20 @@ class Othello(game.GameState):
         else:
             self.board = board
 
+        # Moves can only be made on empty squares next to occupied ones, so
+        # only these squares are searched for moves
+        if frontier is None:
+            occupied = (self.board != EMPTY)[np.newaxis]
+            bordering = np.zeros_like(occupied)
+
+            for dx, dy in DIRECTIONS:
+                bordering |= shift(occupied, dx, dy)
+
+            frontier = set(zip(*np.nonzero(bordering[0] & ~occupied[0])))
+            frontier = {(int(x), int(y)) for x, y in frontier}
+
+        self.frontier = frontier
+
         # If we have a custom starting player
         if turn is not None:
             # Make sure the current turn is valid
@@ -67,6 +114,12 @@ class Othello(game.GameState):
             else:
                 raise ValueError('Invalid initializing player')
 
+    def __setstate__(self, state):
+        # Games saved before the frontier and move caches existed only store
+        # the board and players
+        self.__init__(board=state['board'], turn=state['players'][0],
+                      frontier=state.get('frontier'))
+
     def __str__(self) -> str:
         '''
         Give a human-readable version of the othello board. One that visually
@@ -83,22 +136,26 @@ class Othello(game.GameState):
         corners = {'ul': '\u250F', 'ur': '\u2513',
                    'bl': '\u2517', 'br': '\u251B'}
 
+        # Leave room for the row labels, which can have two digits
+        width = len(str(rotated.shape[0]))
+        margin = ' ' * (width + 1)
+
         # Draw the top edge of the board
-        string = '  ' + corners['ul'] + top * \
+        string = margin + corners['ul'] + top * \
             (rotated.shape[0] * 2 - 1) + corners['ur'] + '\n'
 
         # Draw the board
         for y, row in enumerate(rotated):
-            string += str(rotated.shape[1] - y - DEBUG_INDEXES) + \
+            string += str(rotated.shape[0] - y - DEBUG_INDEXES).rjust(width) + \
                 ' ' + side + ' '.join(row) + side + '\n'
 
         # Draw the bottom edge of the board
-        string += '  ' + corners['bl'] + top * \
+        string += margin + corners['bl'] + top * \
             (rotated.shape[0] * 2 - 1) + corners['br'] + '\n'
 
         # Draw the indices of the board columns
-        string += '   ' + ' '.join([chr(65 - (17 * DEBUG_INDEXES) + x)
-                                    for x in range(rotated.shape[0])]) + '\n'
+        string += margin + ' ' + ' '.join([chr(65 - (17 * DEBUG_INDEXES) + x)
+                                           for x in range(rotated.shape[1])]) + '\n'
 
         return string
 
@@ -108,149 +165,200 @@ class Othello(game.GameState):
     def get_current_turn(self) -> str:
         return self.players[0]
 
-    def get_possible_moves(self, player: str) -> np.ndarray:
+    def get_possible_moves(self, player: str) -> list:
         # Make sure it's the player's turn
         if player != self.get_current_turn():
-            return np.empty(0)
-
-        # Boolean array to track where legal moves can be made
-        possible_moves = []
-
-        # Find moves by iterating through each square, determining if it contains
-        # the player's piece, then checking each direction to see if a move can
-        # be made flipping the opponent's pieces in that direction
-        for x, col in enumerate(self.board):
-            for y, square in enumerate(col):
-
-                # Check if player has a piece in that square
-                if square == player:
-                    for dx, dy in DIRECTIONS:
-                        # Expand in each direction until we reach an edge
-                        i = 1
-                        while 0 <= x+dx*i < self.board.shape[1] and \
-                                0 <= y+dy*i < self.board.shape[0]:
-
-                            if self.board[x+dx*i][y+dy*i] == player:
-                                # This direction is broken by one of the
-                                # player's pieces, so we can't play here
-                                break
-                            elif self.board[x+dx*i][y+dy*i] == EMPTY:
-                                # By the time we've gotten to this y+dy*i and
-                                # x+dx*i, we know we've got an unbroken line of
-                                # the enemy's pieces, and now one gap. So this
-                                # is a possible move, provided there is at least
-                                # one enemy piece between the player's pieces
-                                if i > 1:
-                                    possible_moves.append((x+dx*i, y+dy*i))
-
-                                # We're done searching in this direction
-                                break
-
-                            # If none of the above conditions were met, we
-                            # haven't found a valid move, but there could still
-                            # be a valid move in this direction.
-                            #
-                            # Increment the counter to continue in the direction
-                            i += 1
-
-        return possible_moves
+            return []
+
+        return self.find_moves(player)
+
+    def find_moves(self, player: str) -> list:
+        '''
+        Returns the squares where the given player could place a piece,
+        whether or not it is their turn. Only the frontier of empty squares
+        next to occupied ones is searched, so the work grows with the
+        frontier rather than the whole board.
+
+        Arguments:
+
+            player      The player whose moves are found
+        '''
+
+        if player not in self.__moves:
+            self.__moves[player] = sorted(
+                square for square in self.frontier if self.flips(player, square))
+
+        return self.__moves[player]
+
+    def flips(self, player: str, square: tuple) -> list:
+        '''
+        Returns the opponent's pieces flipped by the given player placing a
+        piece on the given empty square. The move is legal if there are any.
+
+        Arguments:
+
+            player      The player placing the piece
+
+            square      The (x, y) coordinate of the square
+        '''
+
+        # Reading squares from nested lists is much faster than from NumPy
+        if self.__rows is None:
+            self.__rows = self.board.tolist()
+
+        rows = self.__rows
+        width, height = self.board.shape
+        x, y = square
+
+        flipped = []
+
+        for dx, dy in DIRECTIONS:
+            # Expand in each direction until we reach an edge, collecting the
+            # opponent's pieces along the way
+            line = []
+            i = 1
+
+            while 0 <= x+dx*i < width and 0 <= y+dy*i < height:
+                piece = rows[x+dx*i][y+dy*i]
+
+                if piece == player:
+                    # An unbroken line of the opponent's pieces is closed off
+                    # by one of the player's pieces, so flip it
+                    flipped.extend(line)
+                    break
+                elif piece == EMPTY:
+                    # We've hit a gap, so nothing is flipped this way
+                    break
+
+                # The piece is the opponent's, but it is only flipped if the
+                # line is closed off further along
+                line.append((x+dx*i, y+dy*i))
+                i += 1
+
+        return flipped
+
+    @property
+    def action_size(self) -> int:
+        '''
+        The number of squares on the board. Square (x, y) is action
+        x * height + y.
+        '''
+        return self.board.size
+
+    def encode_move(self, move: tuple) -> int:
+        x, y = move
+        width, height = self.board.shape
+
+        if not (0 <= x < width and 0 <= y < height):
+            raise ValueError(move, 'Not on the board')
+
+        return int(x) * height + int(y)
+
+    def decode_move(self, action: int) -> tuple:
+        x, y = np.unravel_index(action, self.board.shape)
+        return int(x), int(y)
+
+    def legal_mask(self, player: str) -> np.ndarray:
+        # The board never changes, so the mask only has to be found once
+        if player not in self.__legal_masks:
+            mask = np.zeros(self.action_size, dtype=bool)
+
+            for move in self.get_possible_moves(player):
+                mask[self.encode_move(move)] = True
+
+            self.__legal_masks[player] = mask
+
+        return self.__legal_masks[player]
 
     def move(self, player: str, move: tuple) -> Othello:
         '''
         Returns a new Othello object representing the next state of the game
         after this move is made.
 
+        If the opponent then has no legal move, they pass, and it stays the
+        turn of the player making this move.
+
         Arguments:
 
             player      The player who is making this move
 
             move        The tuple representing the coordinate of the square to
-                        place the player's piece
+                        place the player's piece, or its integer action
         '''
 
+        # Get the coordinate of integer actions
+        if np.ndim(move) == 0:
+            move = self.decode_move(move)
+
         # Make sure it's the player's turn
         if player != self.get_current_turn():
             raise ValueError(
                 type(player), 'It is not {0}\'s turn'.format(player))
 
         # Make sure the move is allowed
-        if move not in self.get_possible_moves(player):
+        try:
+            legal = self.legal_mask(player)[self.encode_move(move)]
+        except ValueError:  # The coordinate is off the board
+            legal = False
+
+        if not legal:
             raise ValueError(move, 'Invalid move')
 
+        move = tuple(int(i) for i in move)
+
         # Copy the state to create a new Othello state
         new_state = np.copy(self.board)
         new_state[move] = player
 
-        # Get the x, y coordinate of the new piece
-        x, y = move
-
         # Flip all the pieces for the move
-        for dx, dy in DIRECTIONS:
-            # Expand in each direction until we reach an edge, verifying a
-            # possible flip
-            i = 1
-            flip_good = False
+        for square in self.flips(player, move):
+            new_state[square] = player
 
-            while 0 <= x+dx*i < new_state.shape[0] and \
-                    0 <= y+dy*i < new_state.shape[1]:
+        # The square is no longer empty, but its empty neighbours are now on
+        # the frontier
+        width, height = self.board.shape
+        x, y = move
 
-                if new_state[x+dx*i][y+dy*i] == player:
-                    # By the time we've gotten to this y+dy*i and
-                    # x+dx*i, we know we've got an unbroken line of
-                    # the enemy's pieces, and now one gap. So this
-                    # is a possible move, provided there is at least
-                    # one enemy piece between the player's pieces
-                    if i > 1:
-                        flip_good = True
+        frontier = set(self.frontier)
+        frontier.discard(move)
+        frontier.update((x+dx, y+dy) for dx, dy in DIRECTIONS
+                        if 0 <= x+dx < width and 0 <= y+dy < height
+                        and new_state[x+dx, y+dy] == EMPTY)
 
-                    break
-                elif new_state[x+dx*i][y+dy*i] == EMPTY:
-                    # We're done searching in this direction
-                    # We've hit a gap
-                    break
+        # Create the next game state
+        next_state = Othello(board=new_state, turn=self.players[1],
+                             frontier=frontier)
 
-                # If none of the above conditions were met, we
-                # haven't found a valid move, but there could still
-                # be a valid move in this direction.
-                #
-                # Increment the counter to continue in the direction
-                i += 1
-
-            # If the direction just checked can be flipped, flip it
-            if flip_good:
-                for n in range(i-1, 0, -1):
-                    new_state[x+dx*n][y+dy*n] = player
+        # The opponent passes if they can't move but the player can
+        if len(next_state.find_moves(self.players[1])) == 0 and \
+                len(next_state.find_moves(player)) != 0:
+            next_state.next_turn()
 
-        # Create and return the next game state
-        return Othello(board=new_state, turn=self.players[1])
+        return next_state
 
     def get_winner(self) -> str:
         # Return no winner if the game is not finished
         if not self.is_finished():
             return None
 
-        winner = None
-        high_score = 0
+        scores = [np.count_nonzero(self.board == p) for p in self.players]
 
-        # Linear search for winner
-        for p in self.players:
-            score = np.count_nonzero(self.board == p)
-            if score > high_score:
-                high_score = score
-                winner = p
+        # Nobody wins if the players have the same number of pieces
+        if scores.count(max(scores)) > 1:
+            return game.DRAW
 
-        return winner
+        return self.players[int(np.argmax(scores))]
 
     def is_finished(self):
 
         # If all the squares are filled, the game is finished
-        if np.count_nonzero(self.board) == self.board.size:
+        if len(self.frontier) == 0:
             return True
 
         for player in self.players:
 
             # If ANY player can make a move, the game is not over
-            if len(self.get_possible_moves(player)) != 0:
+            if len(self.find_moves(player)) != 0:
                 return False
 
         # The last for loop checked if any players can make a move. Since no
@@ -258,6 +366,136 @@ class Othello(game.GameState):
         return True
 
 
+class PositionalEvaluator(Evaluator):
+    '''
+    Scores Othello boards by the classic positional weights of the squares
+    each player holds (corners good, squares next to corners bad) together
+    with the mobility of each player. A whole batch of boards is scored with
+    a handful of NumPy operations.
+    '''
+
+    def __init__(self, mobility_weight=1.0, position_weight=2.0):
+        '''
+        Arguments:
+
+            mobility_weight     How much having more moves than the opponent
+                                counts towards the score
+
+            position_weight     How much holding better squares than the
+                                opponent counts towards the score
+        '''
+
+        self.mobility_weight = mobility_weight
+        self.position_weight = position_weight
+
+    def evaluate(self, states: List[Othello], rng=None):
+        boards = np.stack([state.board for state in states])
+        turns = np.array([state.get_current_turn()
+                          for state in states])[:, np.newaxis, np.newaxis]
+
+        own = boards == turns
+        empty = boards == EMPTY
+        opponent = ~own & ~empty
+
+        weights = positional_weights(boards.shape[1:])
+
+        # Difference in positional weight, scaled to between -1 and 1
+        position = np.sum(weights * (own.astype(float) - opponent),
+                          axis=(1, 2)) / np.abs(weights).sum()
+
+        own_moves = legal_moves(own, opponent)
+        own_mobility = own_moves.sum(axis=(1, 2))
+        opponent_mobility = legal_moves(opponent, own).sum(axis=(1, 2))
+        mobility = (own_mobility - opponent_mobility) / \
+            (own_mobility + opponent_mobility + 1)
+
+        values = 0.5 + 0.5 * np.tanh(self.position_weight * position +
+                                     self.mobility_weight * mobility)
+
+        # Prefer moves to the squares with the best positional weight
+        preference = np.where(own_moves, np.exp(4 * weights), 0)
+        preference /= np.maximum(preference.sum(axis=(1, 2), keepdims=True), 1e-12)
+
+        # Flatten each board into the action space
+        return values, preference.reshape(len(states), -1)
+
+
+@lru_cache()
+def positional_weights(shape):
+    '''
+    Returns the positional weight of each square on a board of the given
+    shape. Corners are worth the most, edges a little, and the squares giving
+    the opponent access to a corner are penalised.
+    '''
+
+    weights = np.zeros(shape)
+
+    # Edges
+    weights[[0, -1], :] = 0.1
+    weights[:, [0, -1]] = 0.1
+
+    for x in (0, -1):
+        for y in (0, -1):
+            dx = 1 if x == 0 else -1
+            dy = 1 if y == 0 else -1
+
+            # Corners
+            weights[x, y] = 1
+
+            # Squares next to the corner along the edges
+            weights[x + dx, y] = -0.25
+            weights[x, y + dy] = -0.25
+
+            # Square diagonal to the corner
+            weights[x + dx, y + dy] = -0.5
+
+    return weights
+
+
+def shift(squares: np.ndarray, dx, dy) -> np.ndarray:
+    '''
+    Moves every square of a batch of boolean boards by the given change in x
+    and y, dropping squares moved off the edge of the board
+    '''
+
+    shifted = np.zeros_like(squares)
+    width, height = squares.shape[1:]
+
+    shifted[:, max(dx, 0):width + min(dx, 0), max(dy, 0):height + min(dy, 0)] = \
+        squares[:, max(-dx, 0):width - max(dx, 0), max(-dy, 0):height - max(dy, 0)]
+
+    return shifted
+
+
+def legal_moves(own: np.ndarray, opponent: np.ndarray) -> np.ndarray:
+    '''
+    Finds the legal moves on a batch of boards at once
+
+    Arguments:
+
+        own         Boolean boards of the squares held by the player to move
+
+        opponent    Boolean boards of the squares held by their opponent
+
+    Returns:
+        Boolean boards of the squares where the player can place a piece
+    '''
+
+    empty = ~own & ~opponent
+    moves = np.zeros_like(own)
+
+    for dx, dy in DIRECTIONS:
+        # Grow unbroken lines of the opponent's pieces from the player's pieces
+        line = shift(own, dx, dy) & opponent
+        for _ in range(max(own.shape[1:]) - 3):
+            line |= shift(line, dx, dy) & opponent
+
+        # A line ending on an empty square is a move
+        moves |= shift(line, dx, dy) & empty
+
+    return moves
+
+
 def main():
     print(Othello())
     print(Othello().get_possible_moves(DARK))
@@ -0,0 +1,142 @@
+'''
+Streams of random numbers for the search, rollouts and parallel games.
+
+Every search draws from an explicit stream instead of the global NumPy random
+state, so that searches running side by side don't share state and seeded
+runs can be replayed exactly. Independent streams for worker processes are
+spawned from a single seed with numpy.random.SeedSequence.
+
+Random numbers are drawn from the generator in bulk and handed out one by one,
+which is much faster than one generator call per draw.
+'''
+
+from __future__ import annotations
+
+import os
+from typing import Iterator, Union
+
+import numpy as np
+
+
+class RandomStream:
+    '''
+    Hands out random numbers drawn in bulk from a numpy.random.Generator
+    '''
+
+    def __init__(self, generator: np.random.Generator = None, buffer_size=4096):
+        '''
+        Arguments:
+
+            generator   The generator to draw from. A freshly seeded one if
+                        None.
+
+            buffer_size The number of random numbers drawn at once
+        '''
+
+        self.generator = np.random.default_rng() if generator is None else generator
+        self.buffer_size = buffer_size
+
+        self.buffer = np.empty(0)
+        self.position = 0
+
+    def random(self) -> float:
+        '''
+        Returns a random number between 0 (inclusive) and 1 (exclusive)
+        '''
+
+        if self.position == len(self.buffer):
+            self.buffer = self.generator.random(self.buffer_size)
+            self.position = 0
+
+        value = self.buffer[self.position]
+        self.position += 1
+
+        return value
+
+    def integer(self, n) -> int:
+        '''
+        Returns a random integer between 0 (inclusive) and n (exclusive)
+        '''
+
+        return int(self.random() * n)
+
+    def weighted(self, weights) -> int:
+        '''
+        Returns a random index into the given non-negative weights, with each
+        index chosen in proportion to its weight
+        '''
+
+        totals = np.cumsum(weights)
+        index = np.searchsorted(totals, self.random() * totals[-1], side='right')
+
+        return int(min(index, len(totals) - 1))
+
+
+def as_stream(rng: Union[RandomStream, np.random.Generator, int, None]) -> RandomStream:
+    '''
+    Returns the random stream to use for the given argument: the stream itself,
+    a stream drawing from a Generator or seeded with a seed, or the shared
+    default stream if None
+    '''
+
+    if rng is None:
+        return default_stream
+
+    if isinstance(rng, RandomStream):
+        return rng
+
+    if isinstance(rng, np.random.Generator):
+        return RandomStream(rng)
+
+    return RandomStream(np.random.default_rng(rng))
+
+
+def spawn_streams(seed, n) -> Iterator[RandomStream]:
+    '''
+    Creates n independent random streams, e.g. one for each worker process or
+    game, which are the same every time for the same seed. The streams are
+    created one at a time as they are needed.
+
+    Arguments:
+
+        seed        The seed of all the streams, or None for a random seed
+
+        n           The number of streams
+    '''
+
+    for child in np.random.SeedSequence(seed).spawn(n):
+        yield RandomStream(np.random.default_rng(child))
+
+
+def keyed_stream(seed, key: str) -> RandomStream:
+    '''
+    Creates the random stream for something identified by a key, e.g. a game
+    state by GameState.key(), which is the same every time for the same seed
+    and key, whatever other streams are created
+
+    Arguments:
+
+        seed        The seed shared by all the keyed streams
+
+        key         The hexadecimal key of the stream
+    '''
+
+    return RandomStream(np.random.default_rng(
+        np.random.SeedSequence([seed, int(key, 16) % 2 ** 63])))
+
+
+def _reseed_default_stream():
+    '''
+    Gives a forked worker process a default stream of its own, instead of a
+    copy of the parent's which would draw the same numbers in every worker
+    '''
+
+    global default_stream
+    default_stream = RandomStream()
+
+
+# Used whenever no stream is given
+default_stream = RandomStream()
+
+if hasattr(os, 'register_at_fork'):  # Not on Windows, which doesn't fork
+    os.register_at_fork(after_in_child=_reseed_default_stream)
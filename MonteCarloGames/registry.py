@@ -0,0 +1,135 @@
+'''
+Keeps track of the games that can be played, without importing them until
+they are needed.
+
+Other packages can add games by declaring an entry point in the
+'MonteCarloGames.games' group, e.g. in their setup.py:
+
+    entry_points={'MonteCarloGames.games': ['Connect Four = connect4:ConnectFour']}
+'''
+
+from __future__ import annotations
+
+import importlib
+from typing import Dict, List, Union
+
+# The entry point group searched for games provided by other packages
+ENTRY_POINT_GROUP = 'MonteCarloGames.games'
+
+# The games that can be played, by name. Each game is either its GameState
+# class or, until it is first loaded, the 'module:class' path to it
+_games: Dict[str, Union[type, str]] = {
+    'Tic Tac Toe': 'MonteCarloGames.tic_tac_toe:TicTacToe',
+    'Othello': 'MonteCarloGames.othello:Othello',
+    'Othello 6x6': 'MonteCarloGames.othello:Othello',
+    'Othello 10x10': 'MonteCarloGames.othello:Othello',
+    'Othello 12x12': 'MonteCarloGames.othello:Othello',
+    'Othello 16x16': 'MonteCarloGames.othello:Othello',
+}
+
+# The keyword arguments each game's starting state is created with, by name,
+# for games which are variants of another game, e.g. its board size
+_options: Dict[str, dict] = {
+    'Othello 6x6': {'size': 6},
+    'Othello 10x10': {'size': 10},
+    'Othello 12x12': {'size': 12},
+    'Othello 16x16': {'size': 16},
+}
+
+_entry_points_loaded = False
+
+
+def register_game(name: str, game: Union[type, str], **options):
+    '''
+    Makes a game available to be played
+
+    Arguments:
+
+        name        The name the game is listed under
+
+        game        The GameState class of the game, or the 'module:class'
+                    path to it so that it is only imported when played
+
+        options     Keyword arguments the starting state of the game is
+                    created with, e.g. size=12 for a variant of Othello
+    '''
+
+    _games[name] = game
+    _options[name] = options
+
+
+def available_games() -> List[str]:
+    '''
+    Returns the names of all the games that can be played
+    '''
+
+    _load_entry_points()
+
+    return list(_games.keys())
+
+
+def get_game(name: str) -> type:
+    '''
+    Returns the GameState class of the game with the given name, importing it
+    if it has not been imported yet
+
+    Arguments:
+
+        name        The name of the game, as listed by available_games()
+    '''
+
+    _load_entry_points()
+
+    if name not in _games:
+        raise KeyError(name, 'Unknown game')
+
+    game = _games[name]
+
+    if isinstance(game, str):
+        module, _, attribute = game.partition(':')
+        game = getattr(importlib.import_module(module), attribute)
+        _games[name] = game
+
+    return game
+
+
+def get_options(name: str) -> dict:
+    '''
+    Returns the keyword arguments the starting state of the game with the
+    given name is created with
+
+    Arguments:
+
+        name        The name of the game, as listed by available_games()
+    '''
+
+    return dict(_options.get(name, {}))
+
+
+def _load_entry_points():
+    '''
+    Adds the games declared by other installed packages. The games themselves
+    are not imported yet.
+    '''
+
+    global _entry_points_loaded
+
+    if _entry_points_loaded:
+        return
+
+    _entry_points_loaded = True
+
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:  # Python < 3.8
+        return
+
+    found = entry_points()
+    if hasattr(found, 'select'):
+        found = found.select(group=ENTRY_POINT_GROUP)
+    else:  # Python < 3.10
+        found = found.get(ENTRY_POINT_GROUP, [])
+
+    for entry_point in found:
+        # Games registered explicitly take priority
+        _games.setdefault(entry_point.name, entry_point.value)
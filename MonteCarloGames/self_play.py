@@ -0,0 +1,355 @@
+'''
+Generates training data for evaluators by letting the Monte Carlo search play
+against itself.
+
+Every position of every game is recorded with the board, the side to move,
+the distribution of the search's visits over the actions from that position
+and the final outcome of the game. The records are streamed into shards of
+fixed-size .npy files, so memory use is bounded by the size of one shard, and
+the shards can be loaded again without copying with load_shards().
+'''
+
+from __future__ import annotations
+
+import argparse
+import glob
+import multiprocessing
+import os
+from itertools import repeat
+from typing import Dict, List, Union
+
+import numpy as np
+
+from .evaluator import Evaluator, score
+from .monte_carlo import Node
+from .random_streams import RandomStream, spawn_streams
+from .registry import get_game, get_options
+
+# The arrays stored for every position, in the order they are written
+FIELDS = ('boards', 'sides', 'policies', 'outcomes')
+
+
+def play_game(game: Union[type, str], simulations=200, evaluator: Evaluator = None,
+              rng: RandomStream = None, options: dict = None) -> Dict[str, np.ndarray]:
+    '''
+    Plays one game of the search against itself
+
+    Arguments:
+
+        game        The GameState class of the game, or its registered name
+
+        simulations The number of simulations run before each move
+
+        evaluator   Scores leaf states instead of playing them out. Optional.
+
+        rng         The random stream the search draws from. Games played
+                    side by side in worker processes need streams of their
+                    own. Optional.
+
+        options     Keyword arguments the starting state is created with,
+                    e.g. size=12 for Othello. Added to those of a registered
+                    game. Optional.
+
+    Returns:
+        A dictionary with, for every position of the game:
+
+            boards      The board, as given by GameState.encode_board()
+
+            sides       The index in the game's sides of the player to move
+
+            policies    The visit distribution over the actions
+
+            outcomes    The final result for the player to move: 1 for a
+                        win, 0 for a draw and -1 for a loss
+    '''
+
+    if isinstance(game, str):
+        options = {**get_options(game), **(options or {})}
+        game = get_game(game)
+
+    node = Node(game(**(options or {})))
+
+    boards = []
+    turns = []
+    policies = []
+
+    while not node.state.is_finished():
+        turn = node.state.get_current_turn()
+        move = node.get_move(evaluator, simulations=simulations, rng=rng)
+
+        boards.append(node.state.encode_board())
+        turns.append(turn)
+        policies.append(node.visit_distribution())
+
+        # Keep the statistics already gathered for the following position
+        node = node.next_state(move, turn)
+
+    winner = node.state.get_winner()
+
+    return {
+        'boards': np.array(boards, dtype=np.int8),
+        'sides': np.array([game.sides.index(turn) for turn in turns], dtype=np.int8),
+        'policies': np.array(policies, dtype=np.float32),
+        'outcomes': np.array([2 * score(winner, turn) - 1 for turn in turns], dtype=np.int8),
+    }
+
+
+def _play_game(arguments):
+    '''
+    Unpacks the arguments of play_game() for the worker processes
+    '''
+
+    return play_game(*arguments)
+
+
+class ShardWriter:
+    '''
+    Streams position records into shards of fixed-size .npy files
+
+    Each shard is made of one memory-mapped file per field, named
+    '<prefix>-<shard number>.<field>.npy'. Only the last shard can hold fewer
+    than shard_size positions.
+    '''
+
+    def __init__(self, directory, board_shape, action_size, shard_size=65536,
+                 prefix='self_play', overwrite=False):
+        '''
+        Arguments:
+
+            directory   The directory the shards are written to
+
+            board_shape The shape of the encoded boards
+
+            action_size The size of the game's action space
+
+            shard_size  The number of positions stored in each shard
+
+            prefix      The start of the shard file names
+
+            overwrite   Delete the shards already in the directory with the
+                        same prefix, instead of refusing to write. Otherwise
+                        the shards left over from a longer earlier run would
+                        be loaded together with the new ones.
+        '''
+
+        self.directory = directory
+        self.shard_size = shard_size
+        self.prefix = prefix
+
+        self.shapes = {'boards': tuple(board_shape), 'sides': (),
+                       'policies': (action_size,), 'outcomes': ()}
+        self.dtypes = {'boards': np.int8, 'sides': np.int8,
+                       'policies': np.float32, 'outcomes': np.int8}
+
+        os.makedirs(directory, exist_ok=True)
+
+        existing = shard_paths(directory, prefix)
+
+        if len(existing) > 0 and not overwrite:
+            raise FileExistsError(
+                existing[0], 'Shards with the prefix {0!r} already exist'.format(prefix))
+
+        for path in existing:
+            os.remove(path)
+
+        self.shard = -1
+        self.arrays = None
+        self.filled = 0
+        self.written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+    def path(self, shard, field):
+        '''
+        Returns the path of the file storing the given field of a shard
+        '''
+
+        return os.path.join(self.directory, '{0}-{1:05d}.{2}.npy'.format(
+            self.prefix, shard, field))
+
+    def write(self, records: Dict[str, np.ndarray]):
+        '''
+        Appends the positions of a game, as given by play_game(), starting new
+        shards as they fill up
+        '''
+
+        count = len(records['sides'])
+        start = 0
+
+        while start < count:
+            if self.arrays is None or self.filled == self.shard_size:
+                self._next_shard()
+
+            n = min(count - start, self.shard_size - self.filled)
+
+            for field in FIELDS:
+                self.arrays[field][self.filled:self.filled + n] = \
+                    records[field][start:start + n]
+
+            self.filled += n
+            self.written += n
+            start += n
+
+    def close(self):
+        '''
+        Flushes the last shard to disk, cutting it down to the positions
+        actually written
+        '''
+
+        if self.arrays is None:
+            return
+
+        for field in FIELDS:
+            self.arrays[field].flush()
+
+        if self.filled < self.shard_size:
+            filled = {field: np.array(self.arrays[field][:self.filled])
+                      for field in FIELDS}
+
+            # Release the memory maps before replacing their files
+            self.arrays = None
+
+            for field in FIELDS:
+                path = self.path(self.shard, field)
+
+                with open(path + '.tmp', 'wb') as file:
+                    np.save(file, filled[field])
+
+                os.replace(path + '.tmp', path)
+
+        self.arrays = None
+
+    def _next_shard(self):
+        if self.arrays is not None:
+            for field in FIELDS:
+                self.arrays[field].flush()
+
+        self.shard += 1
+        self.filled = 0
+        self.arrays = {field: np.lib.format.open_memmap(
+            self.path(self.shard, field), mode='w+', dtype=self.dtypes[field],
+            shape=(self.shard_size,) + self.shapes[field])
+            for field in FIELDS}
+
+
+def generate(game: Union[type, str], games, directory, simulations=200,
+             evaluator: Evaluator = None, workers=None, shard_size=65536,
+             prefix='self_play', seed=None, options: dict = None,
+             overwrite=False) -> int:
+    '''
+    Plays many games of the search against itself in parallel worker
+    processes, streaming the positions into shards as each game finishes.
+
+    Every game has its own random stream spawned from the seed, and games are
+    written in order, so the same seed always writes the same shards.
+
+    Arguments:
+
+        game        The GameState class of the game, or its registered name
+
+        games       The number of games to play
+
+        directory   The directory the shards are written to
+
+        simulations The number of simulations run before each move
+
+        evaluator   Scores leaf states instead of playing them out. Optional.
+
+        workers     The number of worker processes. Defaults to the number
+                    of CPUs
+
+        shard_size  The number of positions stored in each shard
+
+        prefix      The start of the shard file names
+
+        seed        The seed of the games' random streams. Random if None.
+
+        options     Keyword arguments the starting states are created with,
+                    e.g. size=12 for Othello. Added to those of a registered
+                    game. Optional.
+
+        overwrite   Replace the shards of an earlier run with the same prefix
+                    instead of refusing to write
+
+    Returns:
+        The number of positions written
+    '''
+
+    if isinstance(game, str):
+        options = {**get_options(game), **(options or {})}
+        game = get_game(game)
+
+    state = game(**(options or {}))
+
+    writer = ShardWriter(directory, state.encode_board().shape, state.action_size,
+                         shard_size=shard_size, prefix=prefix, overwrite=overwrite)
+
+    with writer, multiprocessing.Pool(workers) as pool:
+        # Forked workers all start from a copy of the parent's random state,
+        # so without a stream of its own every worker would play the same games
+        arguments = zip(repeat(game), repeat(simulations), repeat(evaluator),
+                        spawn_streams(seed, games), repeat(options))
+
+        for records in pool.imap(_play_game, arguments):
+            writer.write(records)
+
+    return writer.written
+
+
+def shard_paths(directory, prefix='self_play', field='*') -> List[str]:
+    '''
+    Returns the paths of the files of the shards with the given prefix in a
+    directory, in order, for one field or for all of them
+    '''
+
+    return sorted(glob.glob(os.path.join(
+        directory, '{0}-[0-9]*.{1}.npy'.format(glob.escape(prefix), field))))
+
+
+def load_shards(directory, prefix='self_play') -> Dict[str, List[np.ndarray]]:
+    '''
+    Opens the shards written to a directory as read-only memory maps, without
+    reading them into memory
+
+    Returns:
+        A dictionary with, for each field, the list of arrays of every shard in
+        order
+    '''
+
+    shards = {field: [] for field in FIELDS}
+
+    for field in FIELDS:
+        for path in shard_paths(directory, prefix, field):
+            shards[field].append(np.load(path, mmap_mode='r'))
+
+    return shards
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Generate training data by self-play')
+    parser.add_argument('game', help='The name of the game, e.g. \'Othello 12x12\'')
+    parser.add_argument('directory', help='Where to write the shards')
+    parser.add_argument('-n', '--games', type=int, default=100)
+    parser.add_argument('-s', '--simulations', type=int, default=200)
+    parser.add_argument('-w', '--workers', type=int, default=None)
+    parser.add_argument('--shard-size', type=int, default=65536)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--overwrite', action='store_true',
+                        help='Replace the shards of an earlier run')
+    arguments = parser.parse_args()
+
+    written = generate(arguments.game, arguments.games, arguments.directory,
+                       simulations=arguments.simulations,
+                       workers=arguments.workers, shard_size=arguments.shard_size,
+                       seed=arguments.seed, overwrite=arguments.overwrite)
+
+    print('Wrote', written, 'positions to', arguments.directory)
+
+
+if __name__ == '__main__':
+    main()
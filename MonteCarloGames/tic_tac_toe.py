@@ -1,26 +1,28 @@
 from __future__ import annotations
 
+from functools import lru_cache
+from typing import List
+
 import numpy as np
-import os
 
 from . import game
+from .evaluator import Evaluator
 from .game import GameState
 
-from . import monte_carlo as mct
-from .monte_carlo import Node
-
 
 class TicTacToe(GameState):
     parse_user_input = int
 
+    sides = ('X', 'O')
+
     def __init__(self, board=None, turn=None):
-        self.players = ['X', 'O']
+        self.players = list(self.sides)
 
         if board is None:
             # If starting a new game
             shape = np.array([3, 3])
 
-            self.board = np.arange(np.product(shape)).reshape(
+            self.board = np.arange(np.prod(shape)).reshape(
                 shape).astype(dtype=str)
         elif np.all(np.array(board.shape) == board.shape[1:]):
             # If continuing a game, and the board is properly configured
@@ -60,6 +62,25 @@ class TicTacToe(GameState):
 
         return np.arange(self.board.size)[np.char.isdigit(self.board.flat)]
 
+    @property
+    def action_size(self) -> int:
+        '''
+        The number of squares on the board. Moves are already integer actions.
+        '''
+        return self.board.size
+
+    def encode_move(self, move) -> int:
+        return int(move)
+
+    def decode_move(self, action: int) -> int:
+        return int(action)
+
+    def legal_mask(self, player) -> np.ndarray:
+        if player != self.get_current_turn():
+            return np.zeros(self.action_size, dtype=bool)
+
+        return np.char.isdigit(self.board.flatten())
+
     def move(self, player, move) -> TicTacToe:
         '''
         Returns a new TicTacToe object representing the next state of the game
@@ -79,7 +100,7 @@ class TicTacToe(GameState):
                 type(player), 'It is not {0}\'s turn'.format(player))
 
         # Make sure the move is allowed
-        if move not in self.get_possible_moves(player):
+        if not (0 <= move < self.action_size and self.legal_mask(player)[move]):
             raise ValueError(move, 'Invalid move')
 
         # Copy the state to create a new TicTacToe state
@@ -139,6 +160,71 @@ class TicTacToe(GameState):
         return string
 
 
+class LineEvaluator(Evaluator):
+    '''
+    Scores Tic-Tac-Toe boards by the rows, columns and diagonals each player
+    can still complete, spotting immediate wins and forks. A whole batch of
+    boards is scored with a few NumPy operations.
+    '''
+
+    def evaluate(self, states: List[TicTacToe], rng=None):
+        boards = np.stack([state.board.flatten() for state in states])
+        turns = np.array([state.get_current_turn() for state in states])
+
+        own = boards == turns[:, np.newaxis]
+        opponent = np.char.isalpha(boards) & ~own
+
+        lines = line_incidence(states[0].board.shape[0])
+        size = states[0].board.shape[0]
+
+        # Number of pieces each player has in every line
+        own_count = own.astype(int) @ lines.T
+        opponent_count = opponent.astype(int) @ lines.T
+
+        # Lines that are still open to each player
+        own_open = opponent_count == 0
+        opponent_open = own_count == 0
+
+        # Lines a player can complete with a single move
+        own_threats = own_open & (own_count == size - 1)
+        opponent_threats = opponent_open & (opponent_count == size - 1)
+
+        balance = np.sum(np.where(own_open, own_count ** 2, 0), axis=1) - \
+            np.sum(np.where(opponent_open, opponent_count ** 2, 0), axis=1)
+
+        values = 0.5 + 0.5 * np.tanh(balance / size ** 2)
+
+        # The player to move wins by completing a line, and loses if the
+        # opponent can complete two lines at once
+        values = np.where(opponent_threats.sum(axis=1) > 1, 0.1, values)
+        values = np.where(own_threats.any(axis=1), 0.95, values)
+
+        # Prefer winning, then blocking, then squares on many lines
+        preference = (1 + 10 * own_threats + 5 * opponent_threats) @ lines
+        preference = np.where(own | opponent, 0, preference).astype(float)
+        preference /= np.maximum(preference.sum(axis=1, keepdims=True), 1e-12)
+
+        return values, preference
+
+
+@lru_cache()
+def line_incidence(size) -> np.ndarray:
+    '''
+    Returns a matrix with a row for each row, column and diagonal of a board
+    with the given side length, marking which squares belong to that line
+    '''
+
+    squares = np.arange(size ** 2).reshape(size, size)
+    lines = list(squares) + list(squares.T) + \
+        [squares.diagonal(), np.fliplr(squares).diagonal()]
+
+    incidence = np.zeros((len(lines), size ** 2), dtype=int)
+    for i, line in enumerate(lines):
+        incidence[i, line] = 1
+
+    return incidence
+
+
 def create_game_and_get_game_loop(players):
     game_board = TicTacToe()
 
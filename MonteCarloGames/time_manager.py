@@ -0,0 +1,156 @@
+'''
+Shares out a game clock between the moves of a Monte Carlo player.
+
+Instead of spending the same time on every move, each move's budget is set
+from the time left on the clock, how much of the game is left to play and how
+many moves there are to choose between. The search stops early once the most
+explored move is settled, and any time saved is carried forward to later
+moves.
+'''
+
+from __future__ import annotations
+
+import datetime
+
+import numpy as np
+
+from .evaluator import Evaluator
+
+
+class TimeManager:
+    def __init__(self, total: datetime.timedelta,
+                 increment: datetime.timedelta = datetime.timedelta(0),
+                 typical_branching=8, max_fraction=0.5, settled_share=0.8,
+                 min_fraction=0.25):
+        '''
+        Arguments:
+
+            total               The time on the clock for the whole game
+
+            increment           The time added to the clock after each move
+
+            typical_branching   The number of moves to choose between that
+                                is given the standard budget. Moves with more
+                                options get more time, moves with fewer less.
+
+            max_fraction        The largest fraction of the time left on the
+                                clock spent on any one move
+
+            settled_share       The share of the simulations on the most
+                                explored move at which the search is
+                                considered settled and stops early
+
+            min_fraction        The fraction of a move's budget always spent
+                                before stopping early because the search is
+                                settled
+        '''
+
+        self.remaining = total
+        self.increment = increment
+
+        self.typical_branching = typical_branching
+        self.max_fraction = max_fraction
+        self.settled_share = settled_share
+        self.min_fraction = min_fraction
+
+    def budget(self, node) -> datetime.timedelta:
+        '''
+        Returns the time to spend searching for a move from the given node
+
+        Arguments:
+
+            node        The Monte Carlo node of the current game state
+        '''
+
+        node.expand()
+        branching = len(node.children) + len(node.untried_actions)
+
+        # Forced moves don't need any thought
+        if branching <= 1:
+            return datetime.timedelta(0)
+
+        # Every empty square is roughly one move left in the game, half of
+        # which are this player's
+        empties = np.count_nonzero(node.state.encode_board() == 0)
+        moves_to_go = max(empties / 2, 1)
+
+        budget = self.remaining / moves_to_go + self.increment
+
+        # Think longer about moves with many options
+        budget *= float(np.clip(np.sqrt(branching / self.typical_branching), 0.5, 2))
+
+        return max(min(budget, self.remaining * self.max_fraction),
+                   datetime.timedelta(0))
+
+    def should_stop(self, node, elapsed: datetime.timedelta,
+                    budget: datetime.timedelta, simulations: int) -> bool:
+        '''
+        Returns True if searching on cannot change, or is unlikely to change,
+        which move is explored most
+
+        Arguments:
+
+            node        The Monte Carlo node being searched from
+
+            elapsed     The time spent searching so far
+
+            budget      The time the search may take
+
+            simulations The number of simulations run in the search so far
+        '''
+
+        if len(node.children) < 2 or simulations == 0 or \
+                elapsed <= datetime.timedelta(0):
+            return False
+
+        visits = np.sort([child.total for child in node.children])[::-1]
+
+        # The simulations still expected within the budget at the current rate
+        left = simulations * ((budget - elapsed) / elapsed)
+
+        # The runner-up cannot catch up any more
+        if visits[0] - visits[1] > left:
+            return True
+
+        # The most explored move has clearly settled
+        return elapsed >= budget * self.min_fraction and \
+            visits[0] >= self.settled_share * visits.sum()
+
+    def get_move(self, node, evaluator: Evaluator = None, rng=None):
+        '''
+        Searches for the best move from the given node within its budget and
+        takes the time spent off the clock
+
+        Arguments:
+
+            node        The Monte Carlo node of the current game state
+
+            evaluator   Scores leaf states instead of playing them out.
+                        Optional.
+
+            rng         The random stream the search draws from. Optional.
+
+        Returns:
+            The most explored move, which is the move the search stops early
+            for once it is settled
+        '''
+
+        budget = self.budget(node)
+        start = node.total
+
+        begin = datetime.datetime.now()
+        move = node.get_move(evaluator, time_limit=budget,
+                             should_stop=lambda elapsed: self.should_stop(
+                                 node, elapsed, budget, node.total - start),
+                             rng=rng, by_visits=True)
+        self.spend(datetime.datetime.now() - begin)
+
+        return move
+
+    def spend(self, elapsed: datetime.timedelta):
+        '''
+        Takes the time spent on a move off the clock and adds the increment.
+        Any time the move did not use stays on the clock for later moves.
+        '''
+
+        self.remaining += self.increment - elapsed
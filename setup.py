@@ -18,5 +18,8 @@ setuptools.setup(
     #     "Operating System :: OS Independent",
     # ],
     # packages=setuptools.find_packages(),
-    python_requires='>=3.6',
+    python_requires='>=3.7',
+    install_requires=['numpy'],
+    # The interactive prompts are only needed to play from the command line
+    extras_require={'cli': ['ConsoleQuestionPrompts']},
 )
@@ -0,0 +1,88 @@
+import unittest
+
+import numpy as np
+
+from MonteCarloGames.othello import Othello
+from MonteCarloGames.tic_tac_toe import TicTacToe
+
+
+def random_states(state, count, seed=0):
+    '''
+    Yields the states of a random game, playing on through new games until
+    count states have been seen
+    '''
+
+    rng = np.random.default_rng(seed)
+    start = state
+
+    for _ in range(count):
+        if state.is_finished():
+            state = start
+
+        yield state
+
+        side = state.get_current_turn()
+        moves = state.get_possible_moves(side)
+        state = state.move(side, moves[rng.integers(len(moves))])
+
+
+class TestActionSpace(unittest.TestCase):
+    games = [TicTacToe(), Othello(size=4), Othello(), Othello(size=12)]
+
+    def test_encode_decode_round_trip(self):
+        for state in self.games:
+            actions = np.arange(state.action_size)
+
+            for action in actions:
+                self.assertEqual(state.encode_move(state.decode_move(action)), action)
+
+    def test_othello_encoding_is_row_major(self):
+        state = Othello()
+
+        self.assertEqual(state.encode_move((0, 0)), 0)
+        self.assertEqual(state.encode_move((0, 7)), 7)
+        self.assertEqual(state.encode_move((7, 7)), 63)
+        self.assertEqual(state.decode_move(9), (1, 1))
+
+        with self.assertRaises(ValueError):
+            state.encode_move((8, 0))
+
+    def test_legal_mask_matches_possible_moves(self):
+        for start in self.games:
+            for state in random_states(start, 200):
+                side = state.get_current_turn()
+                moves = state.get_possible_moves(side)
+                mask = state.legal_mask(side)
+
+                self.assertEqual(mask.shape, (state.action_size,))
+                self.assertEqual(sorted(np.flatnonzero(mask)),
+                                 sorted(state.encode_move(move) for move in moves))
+
+    def test_legal_mask_is_empty_when_not_your_turn(self):
+        for state in self.games:
+            other = state.sides[1 - state.sides.index(state.get_current_turn())]
+
+            self.assertFalse(state.legal_mask(other).any())
+
+    def test_play_matches_move(self):
+        for start in self.games:
+            for state in random_states(start, 50, seed=1):
+                side = state.get_current_turn()
+
+                for move in state.get_possible_moves(side):
+                    played = state.play(state.encode_move(move))
+
+                    self.assertEqual(played.key(), state.move(side, move).key())
+
+    def test_encode_board(self):
+        state = Othello()
+        board = state.encode_board()
+
+        self.assertEqual(board.shape, (8, 8))
+        self.assertEqual(board.dtype, np.int8)
+        self.assertEqual(np.count_nonzero(board == 1), 2)
+        self.assertEqual(np.count_nonzero(board == -1), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
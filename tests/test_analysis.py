@@ -0,0 +1,106 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from MonteCarloGames.analysis import annotate, annotate_games, describe
+from MonteCarloGames.evaluator import MixedEvaluator, RolloutEvaluator
+from MonteCarloGames.othello import PositionalEvaluator
+from MonteCarloGames.tic_tac_toe import TicTacToe
+
+
+class TestAnnotate(unittest.TestCase):
+    def setUp(self):
+        start = TicTacToe()
+        self.rounds = [(0, start), (4, start.move('X', 4))]
+
+        self.results = {start.key(): {'values': {4: 0.55, 0: 1.0, 8: 0.5},
+                                      'visits': {4: 120, 0: 1, 8: 40, 2: 0}}}
+
+    def test_best_move_is_most_explored(self):
+        annotation, = annotate(self.rounds, self.results)
+
+        self.assertEqual(annotation['move'], 4)
+        self.assertEqual(annotation['value'], 0.55)
+        self.assertEqual(annotation['best_move'], 4)
+        self.assertEqual(annotation['best_value'], 0.55)
+        self.assertEqual(annotation['loss'], 0)
+
+    def test_loss(self):
+        start = self.rounds[0][1]
+        rounds = [(0, start), (8, start.move('X', 8))]
+
+        annotation, = annotate(rounds, self.results)
+
+        self.assertEqual(annotation['best_move'], 4)
+        self.assertAlmostEqual(annotation['loss'], 0.05)
+
+    def test_unexplored_move(self):
+        start = self.rounds[0][1]
+        rounds = [(0, start), (2, start.move('X', 2))]
+
+        annotation, = annotate(rounds, self.results)
+
+        self.assertIsNone(annotation['value'])
+        self.assertIsNone(annotation['loss'])
+
+
+class TestDescribe(unittest.TestCase):
+    def test_parameters_are_included(self):
+        self.assertEqual(describe(PositionalEvaluator()),
+                         'PositionalEvaluator(mobility_weight=1.0, position_weight=2.0)')
+        self.assertNotEqual(describe(PositionalEvaluator(mobility_weight=3)),
+                            describe(PositionalEvaluator()))
+
+    def test_nested_evaluators(self):
+        mixed = MixedEvaluator(PositionalEvaluator(), RolloutEvaluator(playouts=2))
+
+        self.assertEqual(describe(mixed),
+                         'MixedEvaluator(first=PositionalEvaluator(mobility_weight=1.0, '
+                         'position_weight=2.0), mix=0.5, '
+                         'second=RolloutEvaluator(playouts=2))')
+
+    def test_no_evaluator(self):
+        self.assertEqual(describe(None), 'None')
+
+
+class TestAnnotateGames(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+        self.paths = []
+
+        for i, moves in enumerate([(4, 0, 8, 2, 6), (0, 4, 8, 2, 6, 3, 5, 1, 7)]):
+            rounds = [(0, TicTacToe())]
+            for move in moves:
+                state = rounds[-1][1]
+                rounds.append((move, state.move(state.get_current_turn(), move)))
+
+            self.paths.append(os.path.join(self.directory.name, '{0}.pickle'.format(i)))
+            with open(self.paths[-1], mode='wb') as file:
+                pickle.dump(rounds, file)
+
+    def annotate(self, paths, cache):
+        return dict(annotate_games(paths, simulations=50, workers=2, cache=cache, seed=7))
+
+    def test_seed_replays_whatever_is_cached(self):
+        fresh = self.annotate(self.paths, {})
+
+        # Search the second game with the first game's positions cached
+        cache = {}
+        self.annotate(self.paths[:1], cache)
+        cached = self.annotate(self.paths, cache)
+
+        self.assertEqual(cached, fresh)
+
+    def test_games_are_yielded_in_order(self):
+        cache = {}
+        annotated = list(annotate_games(self.paths, simulations=20, workers=2, cache=cache))
+
+        self.assertEqual([path for path, _ in annotated], self.paths)
+        self.assertEqual([len(moves) for _, moves in annotated], [5, 9])
+
+
+if __name__ == '__main__':
+    unittest.main()
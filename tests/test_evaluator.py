@@ -0,0 +1,104 @@
+import unittest
+
+import numpy as np
+
+from MonteCarloGames.evaluator import Evaluator, MixedEvaluator, RolloutEvaluator
+from MonteCarloGames.othello import Othello, PositionalEvaluator
+from MonteCarloGames.tic_tac_toe import LineEvaluator, TicTacToe
+
+
+class ConstantEvaluator(Evaluator):
+    '''
+    Gives every state the same value and, optionally, the same priors
+    '''
+
+    def __init__(self, value, priors=None):
+        self.value = value
+        self.priors = priors
+
+    def evaluate(self, states, rng=None):
+        priors = None if self.priors is None else np.tile(self.priors, (len(states), 1))
+
+        return np.full(len(states), self.value), priors
+
+
+def random_states(state, count, seed=0):
+    '''
+    Returns count unfinished states of random games
+    '''
+
+    rng = np.random.default_rng(seed)
+    start = state
+    states = []
+
+    while len(states) < count:
+        if state.is_finished():
+            state = start
+            continue
+
+        states.append(state)
+
+        side = state.get_current_turn()
+        moves = state.get_possible_moves(side)
+        state = state.move(side, moves[rng.integers(len(moves))])
+
+    return states
+
+
+class TestEvaluators(unittest.TestCase):
+    def check(self, evaluator, states):
+        values, priors = evaluator.evaluate(states)
+
+        self.assertEqual(values.shape, (len(states),))
+        self.assertTrue(np.all((values >= 0) & (values <= 1)))
+
+        self.assertEqual(priors.shape, (len(states), states[0].action_size))
+        self.assertTrue(np.all(priors >= 0))
+
+        for state, prior in zip(states, priors):
+            mask = state.legal_mask(state.get_current_turn())
+
+            self.assertAlmostEqual(prior.sum(), 1)
+            self.assertAlmostEqual(prior[mask].sum(), 1)
+
+    def test_positional_evaluator(self):
+        for size in (6, 8, 12):
+            self.check(PositionalEvaluator(), random_states(Othello(size=size), 40))
+
+    def test_line_evaluator(self):
+        self.check(LineEvaluator(), random_states(TicTacToe(), 30))
+
+    def test_line_evaluator_spots_wins(self):
+        state = TicTacToe().move('X', 0).move('O', 3).move('X', 1).move('O', 4)
+
+        values, priors = LineEvaluator().evaluate([state])
+
+        self.assertGreater(values[0], 0.9)
+        self.assertEqual(np.argmax(priors[0]), 2)
+
+    def test_rollout_evaluator(self):
+        states = random_states(TicTacToe(), 10)
+
+        values, priors = RolloutEvaluator(playouts=4).evaluate(states, rng=0)
+
+        self.assertIsNone(priors)
+        self.assertTrue(np.all(np.isin(values * 8, np.arange(9))))
+
+    def test_mixed_evaluator(self):
+        states = random_states(TicTacToe(), 3)
+        priors = np.full(9, 1 / 9)
+
+        values, mixed_priors = MixedEvaluator(ConstantEvaluator(0.2), ConstantEvaluator(
+            0.6, priors), mix=0.25).evaluate(states)
+
+        np.testing.assert_allclose(values, 0.3)
+        np.testing.assert_array_equal(mixed_priors, np.tile(priors, (3, 1)))
+
+        _, first_priors = MixedEvaluator(ConstantEvaluator(0.2, priors * 2),
+                                         ConstantEvaluator(0.6, priors)).evaluate(states)
+
+        np.testing.assert_array_equal(first_priors, np.tile(priors * 2, (3, 1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
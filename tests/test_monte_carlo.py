@@ -0,0 +1,295 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from MonteCarloGames import monte_carlo
+from MonteCarloGames.evaluator import Evaluator
+from MonteCarloGames.monte_carlo import Node
+from MonteCarloGames.tic_tac_toe import TicTacToe
+
+
+class RecordingEvaluator(Evaluator):
+    '''
+    Gives every state the same value and priors, remembering the batches it
+    was given
+    '''
+
+    def __init__(self, value=0.5, priors=None):
+        self.value = value
+        self.priors = priors
+        self.batches = []
+
+    def evaluate(self, states, rng=None):
+        self.batches.append(list(states))
+
+        priors = None if self.priors is None else np.tile(self.priors, (len(states), 1))
+
+        return np.full(len(states), self.value), priors
+
+
+def counting_select(path):
+    '''
+    Returns a replacement for Node.select() which always walks the given path,
+    counting the visits like select() does
+    '''
+
+    def select(rng=None):
+        for visited in path:
+            visited.total += 1
+
+        return path
+
+    return select
+
+
+class TestBatch(unittest.TestCase):
+    def test_select_adds_a_virtual_loss(self):
+        root = Node(TicTacToe())
+        root.explore_batch(RecordingEvaluator(), size=1, rng=0)
+
+        path = root.select(rng=0)
+
+        self.assertEqual(len(path), 2)
+        self.assertEqual([node.total for node in path], [2, 1])
+        self.assertEqual(path[1].wins, 0)
+
+    def test_batch_reaches_distinct_leaves(self):
+        evaluator = RecordingEvaluator()
+
+        root = Node(TicTacToe())
+        root.explore_batch(evaluator, size=1, rng=0)
+        root.explore_batch(evaluator, size=9, rng=0)
+
+        leaves = evaluator.batches[-1]
+
+        self.assertEqual(len(leaves), 9)
+        self.assertEqual(len({leaf.key() for leaf in leaves}), 9)
+        self.assertEqual(root.total, 10)
+        self.assertTrue(all(child.total == 1 for child in root.children))
+
+        # Every leaf was visited once the batch was backed up
+        root.explore_batch(evaluator, size=16, rng=0)
+        self.assertEqual(len({leaf.key() for leaf in evaluator.batches[-1]}),
+                         len(evaluator.batches[-1]))
+
+    def test_duplicate_leaves_are_scored_once(self):
+        evaluator = RecordingEvaluator(value=0.75)
+
+        root = Node(TicTacToe())
+        child = root.next_state(4, 'X')
+        child.select = counting_select([child])
+
+        child.explore_batch(evaluator, size=4)
+
+        self.assertEqual([len(batch) for batch in evaluator.batches], [1])
+        self.assertEqual(child.total, 4)
+
+        # The leaf is scored for O, who is to move, so X gets the rest
+        self.assertEqual(child.wins, 4 * 0.25)
+
+    def test_credit_flips_between_sides(self):
+        root = Node(TicTacToe())
+        first = root.next_state(4, 'X')
+        second = first.next_state(0, 'O')
+        root.select = counting_select([root, first, second])
+
+        # X is to move at the leaf
+        root.explore_batch(RecordingEvaluator(value=0.8), size=1)
+
+        self.assertEqual(root.wins, 0)
+        self.assertAlmostEqual(first.wins, 0.8)
+        self.assertAlmostEqual(second.wins, 0.2)
+
+    def test_backpropagate_finished_games(self):
+        root = Node(TicTacToe())
+        path = [root]
+        for move in (0, 3, 1, 4, 2):
+            path.append(path[-1].next_state(move, path[-1].state.get_current_turn()))
+
+        Node.backpropagate(path, lambda side: float(side == 'X'))
+
+        self.assertEqual([node.wins for node in path[1:]], [1, 0, 1, 0, 1])
+
+    def test_priors_reach_children_created_later(self):
+        priors = np.arange(9) / 36
+
+        root = Node(TicTacToe())
+        existing = root.next_state(0, 'X')
+
+        root.explore_batch(RecordingEvaluator(priors=priors), size=1)
+
+        self.assertEqual(existing.prior, priors[0])
+        self.assertEqual(root.next_state(5, 'X').prior, priors[5])
+
+        # The untried move the evaluator likes most is explored first
+        self.assertEqual(root.choose_child(rng=0).action, 8)
+        self.assertEqual(root.children_by_action[8].prior, priors[8])
+
+    def test_search_with_evaluator(self):
+        root = Node(TicTacToe())
+        move = root.get_move(RecordingEvaluator(), simulations=200, rng=0)
+
+        self.assertIn(move, range(9))
+        self.assertGreaterEqual(root.total, 200)
+        self.assertEqual(root.total, 1 + sum(child.total for child in root.children))
+
+
+class TestRave(unittest.TestCase):
+    def setUp(self):
+        previous = monte_carlo.rave_equivalence
+        monte_carlo.rave_equivalence = 100
+        self.addCleanup(setattr, monte_carlo, 'rave_equivalence', previous)
+
+    def test_value_blends_with_amaf(self):
+        node = Node(TicTacToe())
+        node.wins, node.total = 3, 10
+        node.amaf_wins, node.amaf_total = 9, 10
+
+        beta = np.sqrt(100 / (3 * 10 + 100))
+        self.assertAlmostEqual(node.value(), (1 - beta) * 0.3 + beta * 0.9)
+
+        # The AMAF win rate matters less the more the node is simulated
+        node.wins, node.total = 300, 1000
+
+        beta = np.sqrt(100 / (3 * 1000 + 100))
+        self.assertAlmostEqual(node.value(), (1 - beta) * 0.3 + beta * 0.9)
+
+        monte_carlo.rave_equivalence = 0
+        self.assertEqual(node.value(), 0.3)
+
+    def test_unvisited_value_is_amaf_rate(self):
+        node = Node(TicTacToe())
+        node.amaf_wins, node.amaf_total = 9, 10
+
+        self.assertEqual(node.value(), 0.9)
+
+        node.amaf_wins, node.amaf_total = 0, 0
+        self.assertTrue(np.isnan(node.value()))
+
+    def test_unvisited_children_are_ranked_by_amaf(self):
+        root = Node(TicTacToe())
+        for move in range(9):
+            root.next_state(move, 'X')
+
+        root.total = 1
+        root.children_by_action[2].amaf_wins = 1
+        root.children_by_action[2].amaf_total = 10
+        root.children_by_action[5].amaf_wins = 9
+        root.children_by_action[5].amaf_total = 10
+
+        for seed in range(10):
+            self.assertEqual(root.choose_child(rng=seed).action, 5)
+
+    def test_explore_records_amaf(self):
+        root = Node(TicTacToe())
+
+        for _ in range(50):
+            root.explore(rng=0)
+
+        for child in root.children:
+            # Every simulation through a child played its move
+            self.assertGreaterEqual(child.amaf_total, child.total)
+            self.assertLessEqual(child.amaf_wins, child.amaf_total)
+
+        self.assertGreater(sum(child.amaf_total for child in root.children),
+                           sum(child.total for child in root.children))
+
+    def test_backpropagate_records_amaf(self):
+        root = Node(TicTacToe())
+        later = root.next_state(8, 'X')
+        path = [root, root.next_state(4, 'X')]
+        path.append(path[-1].next_state(0, 'O'))
+        path.append(path[-1].next_state(8, 'X'))
+
+        Node.backpropagate(path, lambda side: float(side == 'X'))
+
+        # X played 8 later on, so that move from the root learns the result
+        self.assertEqual((later.amaf_wins, later.amaf_total), (1, 1))
+        self.assertEqual((path[1].amaf_wins, path[1].amaf_total), (1, 1))
+        self.assertEqual((path[2].amaf_wins, path[2].amaf_total), (0, 1))
+        self.assertEqual(later.total, 0)
+
+    def test_amaf_is_kept_for_moves_without_a_child(self):
+        root = Node(TicTacToe())
+        path = [root, root.next_state(4, 'X')]
+        path.append(path[-1].next_state(0, 'O'))
+        path.append(path[-1].next_state(8, 'X'))
+
+        Node.backpropagate(path, lambda side: float(side == 'X'))
+
+        self.assertEqual(root.action_amaf_total[8], 1)
+        self.assertEqual(root.action_amaf_wins[8], 1)
+        self.assertNotIn(8, root.children_by_action)
+
+        # The child starts out with what was learnt before it existed
+        later = root.next_state(8, 'X')
+        self.assertEqual((later.amaf_wins, later.amaf_total), (1, 1))
+
+    def test_untried_moves_are_chosen_by_amaf(self):
+        root = Node(TicTacToe())
+        root.expand()
+
+        root.record_amaf({('X', 2), ('O', 6)}, lambda side: 0.0)
+        root.record_amaf({('X', 6)}, lambda side: 1.0)
+
+        # O's moves are not X's moves from the root
+        self.assertEqual(root.action_amaf_total[6], 1)
+
+        for seed in range(10):
+            root.children, root.children_by_action = [], {}
+            root.untried_actions = list(range(9))
+
+            self.assertEqual(root.choose_child(rng=seed).action, 6)
+
+
+class TestLazyExpansion(unittest.TestCase):
+    def test_expand_creates_no_children(self):
+        root = Node(TicTacToe())
+
+        with mock.patch.object(TicTacToe, 'move', autospec=True,
+                               side_effect=TicTacToe.move) as move:
+            root.expand()
+
+        self.assertEqual(move.call_count, 0)
+        self.assertEqual(root.children, [])
+        self.assertEqual(root.untried_actions, list(range(9)))
+
+    def test_next_state_creates_the_child_on_demand(self):
+        root = Node(TicTacToe())
+
+        child = root.next_state(4, 'X')
+
+        self.assertEqual(root.children, [child])
+        self.assertEqual(child.action, 4)
+        self.assertEqual(child.state.board.flat[4], 'X')
+        self.assertNotIn(4, root.untried_actions)
+        self.assertEqual(len(root.untried_actions), 8)
+
+        self.assertIs(root.next_state(4, 'X'), child)
+        self.assertIsNone(child.next_state(4, 'O'))
+
+    def test_widening_caps_the_children(self):
+        monte_carlo.widening_constant = 1
+        self.addCleanup(setattr, monte_carlo, 'widening_constant', None)
+
+        root = Node(TicTacToe())
+
+        for _ in range(60):
+            root.explore(rng=0)
+
+            self.assertEqual(len(root.children), min(9, np.ceil(np.sqrt(root.total))))
+            self.assertEqual(root.max_children(), np.ceil(np.sqrt(root.total)))
+
+    def test_no_widening(self):
+        root = Node(TicTacToe())
+
+        for _ in range(9):
+            root.explore(rng=0)
+
+        self.assertEqual(root.max_children(), np.inf)
+        self.assertEqual(len(root.children), 9)
+
+
+if __name__ == '__main__':
+    unittest.main()
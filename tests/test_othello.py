@@ -0,0 +1,217 @@
+import pickle
+import unittest
+
+import numpy as np
+
+from MonteCarloGames import game
+from MonteCarloGames.monte_carlo import MonteCarloPlayer, MonteCarloTree
+from MonteCarloGames.othello import (DARK, DIRECTIONS, EMPTY, LIGHT, Othello,
+                                     legal_moves)
+from MonteCarloGames.registry import get_game, get_options
+
+PIECES = {'D': DARK, 'L': LIGHT, '.': EMPTY}
+
+
+def board(columns):
+    '''
+    Creates a board from a string for each column, e.g. board[0] from
+    columns[0], using D for dark, L for light and . for empty squares
+    '''
+
+    return np.array([[PIECES[piece] for piece in column] for column in columns],
+                    dtype=str, order='F')
+
+
+def reference_moves(board, player):
+    '''
+    Finds the legal moves by scanning out from every one of the player's
+    pieces, the way Othello did before the frontier was kept
+    '''
+
+    width, height = board.shape
+    moves = set()
+
+    for x in range(width):
+        for y in range(height):
+            if board[x, y] != player:
+                continue
+
+            for dx, dy in DIRECTIONS:
+                i = 1
+                while 0 <= x+dx*i < width and 0 <= y+dy*i < height:
+                    if board[x+dx*i, y+dy*i] == player:
+                        break
+                    elif board[x+dx*i, y+dy*i] == EMPTY:
+                        if i > 1:
+                            moves.add((x+dx*i, y+dy*i))
+                        break
+                    i += 1
+
+    return sorted(moves)
+
+
+def reference_move(board, player, move):
+    '''
+    Returns the board after the player places a piece, flipping the way
+    Othello did before flips() existed
+    '''
+
+    new_board = np.copy(board)
+    new_board[move] = player
+    x, y = move
+
+    for dx, dy in DIRECTIONS:
+        i = 1
+        flip = False
+
+        while 0 <= x+dx*i < board.shape[0] and 0 <= y+dy*i < board.shape[1]:
+            if new_board[x+dx*i, y+dy*i] == player:
+                flip = i > 1
+                break
+            elif new_board[x+dx*i, y+dy*i] == EMPTY:
+                break
+            i += 1
+
+        if flip:
+            for n in range(1, i):
+                new_board[x+dx*n, y+dy*n] = player
+
+    return new_board
+
+
+def random_games(size, games, seed=0):
+    '''
+    Yields every state of some random games on a board of the given size
+    '''
+
+    rng = np.random.default_rng(seed)
+
+    for _ in range(games):
+        state = Othello(size=size)
+        yield state
+
+        while not state.is_finished():
+            side = state.get_current_turn()
+            moves = state.get_possible_moves(side)
+            state = state.move(side, moves[rng.integers(len(moves))])
+            yield state
+
+
+class TestMoves(unittest.TestCase):
+    def test_moves_and_flips_match_reference(self):
+        for size in (4, 6, 8, 12):
+            for state in random_games(size, 5):
+                side = state.get_current_turn()
+                moves = state.get_possible_moves(side)
+
+                self.assertEqual(moves, reference_moves(state.board, side))
+
+                for move in moves:
+                    np.testing.assert_array_equal(
+                        state.move(side, move).board,
+                        reference_move(state.board, side, move))
+
+    def test_frontier_matches_vectorized_legal_moves(self):
+        for size in (4, 8, 10, 16):
+            states = list(random_games(size, 3, seed=size))
+
+            for player, opponent in ((DARK, LIGHT), (LIGHT, DARK)):
+                own = np.stack([state.board == player for state in states])
+                other = np.stack([state.board == opponent for state in states])
+
+                found = legal_moves(own, other)
+
+                for state, moves in zip(states, found):
+                    self.assertEqual(state.find_moves(player),
+                                     [(int(x), int(y)) for x, y in zip(*np.nonzero(moves))])
+
+    def test_frontier_is_kept_up_to_date(self):
+        for state in random_games(8, 3):
+            self.assertEqual(state.frontier, Othello(board=state.board).frontier)
+
+    def test_invalid_moves(self):
+        state = Othello()
+
+        with self.assertRaises(ValueError):
+            state.move(DARK, (0, 0))
+
+        with self.assertRaises(ValueError):
+            state.move(DARK, (8, 3))
+
+        with self.assertRaises(ValueError):
+            state.move(LIGHT, state.get_possible_moves(DARK)[0])
+
+
+class TestRules(unittest.TestCase):
+    def test_pass(self):
+        state = Othello(board=board(['.LD.', '.DD.', 'DDD.', '....']), turn=LIGHT)
+
+        passed = state.move(LIGHT, (0, 3))
+
+        self.assertEqual(passed.find_moves(DARK), [])
+        self.assertFalse(passed.is_finished())
+        self.assertEqual(passed.get_current_turn(), LIGHT)
+
+    def test_no_pass_when_opponent_can_move(self):
+        state = Othello()
+        after = state.move(DARK, state.get_possible_moves(DARK)[0])
+
+        self.assertEqual(after.get_current_turn(), LIGHT)
+
+    def test_game_ends_when_neither_player_can_move(self):
+        state = Othello(board=board(['DD..', 'DD..', '....', '....']))
+
+        self.assertTrue(state.is_finished())
+        self.assertEqual(state.get_winner(), DARK)
+
+    def test_draw(self):
+        state = Othello(board=board(['DDDD', 'DDDD', 'LLLL', 'LLLL']))
+
+        self.assertTrue(state.is_finished())
+        self.assertEqual(state.get_winner(), game.DRAW)
+
+    def test_winner(self):
+        state = Othello(board=board(['DDDD', 'DDDD', 'LLLL', 'LLLD']))
+
+        self.assertEqual(state.get_winner(), DARK)
+
+    def test_no_winner_before_the_end(self):
+        self.assertIsNone(Othello().get_winner())
+
+
+class TestSizes(unittest.TestCase):
+    def test_starting_position(self):
+        for size in range(4, 27, 2):
+            state = Othello(size=size)
+            middle = size // 2
+
+            self.assertEqual(state.board.shape, (size, size))
+            self.assertEqual(state.board[middle - 1, middle - 1], DARK)
+            self.assertEqual(state.board[middle - 1, middle], LIGHT)
+            self.assertEqual(len(state.get_possible_moves(DARK)), 4)
+
+    def test_invalid_sizes_are_rejected(self):
+        for size in (2, 3, 5, 7, 9, 25, 28):
+            with self.assertRaises(ValueError):
+                Othello(size=size)
+
+    def test_pickle_round_trip(self):
+        state = Othello(size=10)
+        state = state.move(DARK, state.get_possible_moves(DARK)[0])
+
+        loaded = pickle.loads(pickle.dumps(state))
+
+        self.assertEqual(loaded.key(), state.key())
+        self.assertEqual(loaded.frontier, state.frontier)
+        self.assertEqual(loaded.get_possible_moves(LIGHT), state.get_possible_moves(LIGHT))
+
+    def test_registered_variants(self):
+        for name, size in (('Othello', 8), ('Othello 6x6', 6), ('Othello 12x12', 12)):
+            tree = MonteCarloTree(get_game(name), [MonteCarloPlayer] * 2,
+                                  options=get_options(name))
+
+            self.assertEqual(tree.current_state.board.shape, (size, size))
+
+
+if __name__ == '__main__':
+    unittest.main()
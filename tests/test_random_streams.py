@@ -0,0 +1,51 @@
+import multiprocessing
+import unittest
+
+import numpy as np
+
+from MonteCarloGames.random_streams import (RandomStream, as_stream, keyed_stream,
+                                            spawn_streams)
+
+
+def draw(_):
+    return as_stream(None).random()
+
+
+class TestRandomStream(unittest.TestCase):
+    def test_integer_and_weighted_ranges(self):
+        stream = RandomStream(np.random.default_rng(0), buffer_size=7)
+
+        integers = [stream.integer(5) for _ in range(1000)]
+        self.assertEqual(set(integers), set(range(5)))
+
+        weighted = [stream.weighted([0, 1, 0, 3]) for _ in range(1000)]
+        self.assertEqual(set(weighted), {1, 3})
+
+    def test_seeds_replay(self):
+        first = [stream.random() for stream in spawn_streams(1, 3)]
+        second = [stream.random() for stream in spawn_streams(1, 3)]
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(set(first)), 3)
+
+        self.assertEqual(as_stream(5).random(), as_stream(5).random())
+
+    def test_keyed_streams(self):
+        self.assertEqual(keyed_stream(1, 'ab12').random(), keyed_stream(1, 'ab12').random())
+        self.assertNotEqual(keyed_stream(1, 'ab12').random(), keyed_stream(1, 'ab13').random())
+        self.assertNotEqual(keyed_stream(1, 'ab12').random(), keyed_stream(2, 'ab12').random())
+
+    def test_forked_workers_have_their_own_default_stream(self):
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            self.skipTest('Processes cannot be forked')
+
+        draw(None)
+
+        with multiprocessing.get_context('fork').Pool(4) as pool:
+            draws = pool.map(draw, range(4), chunksize=1)
+
+        self.assertEqual(len(set(draws)), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import importlib.metadata
+import json
+import os
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+import MonteCarloGames
+from MonteCarloGames import registry
+from MonteCarloGames.othello import Othello
+from MonteCarloGames.tic_tac_toe import TicTacToe
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def imported_modules(code):
+    '''
+    Runs code in a fresh interpreter and returns the modules it imported
+    '''
+
+    output = subprocess.run(
+        [sys.executable, '-c', code + '\nimport json, sys\nprint(json.dumps(list(sys.modules)))'],
+        cwd=ROOT, capture_output=True, text=True, check=True).stdout
+
+    return set(json.loads(output.splitlines()[-1]))
+
+
+class FoundEntryPoints(list):
+    '''
+    The entry points found by importlib.metadata.entry_points() on Python 3.10
+    and later
+    '''
+
+    def select(self, group):
+        return FoundEntryPoints(entry for entry in self if entry.group == group)
+
+
+class TestLazyImport(unittest.TestCase):
+    def test_import_is_light(self):
+        modules = imported_modules('import MonteCarloGames')
+
+        for module in ('numpy', 'ConsoleQuestionPrompts', 'MonteCarloGames.game',
+                       'MonteCarloGames.othello', 'MonteCarloGames.tic_tac_toe',
+                       'MonteCarloGames.monte_carlo', 'MonteCarloGames.registry'):
+            self.assertNotIn(module, modules)
+
+    def test_names_are_imported_when_used(self):
+        modules = imported_modules('import MonteCarloGames\nMonteCarloGames.TicTacToe')
+
+        self.assertIn('MonteCarloGames.tic_tac_toe', modules)
+        self.assertNotIn('MonteCarloGames.othello', modules)
+        self.assertNotIn('ConsoleQuestionPrompts', modules)
+
+    def test_exported_names(self):
+        for name, module in MonteCarloGames._exports.items():
+            self.assertIs(getattr(MonteCarloGames, name),
+                          getattr(importlib.import_module('MonteCarloGames.' + module), name))
+
+        for name in MonteCarloGames._submodules:
+            self.assertIs(getattr(MonteCarloGames, name),
+                          importlib.import_module('MonteCarloGames.' + name))
+
+        self.assertTrue(set(MonteCarloGames.__all__) <= set(dir(MonteCarloGames)))
+
+        with self.assertRaises(AttributeError):
+            MonteCarloGames.Chess
+
+
+class TestRegistry(unittest.TestCase):
+    def setUp(self):
+        games = mock.patch.dict(registry._games)
+        options = mock.patch.dict(registry._options)
+        loaded = mock.patch.object(registry, '_entry_points_loaded', True)
+
+        for patch in (games, options, loaded):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_builtin_games(self):
+        self.assertIs(registry.get_game('Tic Tac Toe'), TicTacToe)
+        self.assertIs(registry.get_game('Othello 12x12'), Othello)
+        self.assertEqual(registry.get_options('Othello 12x12'), {'size': 12})
+        self.assertEqual(registry.get_options('Othello'), {})
+
+    def test_register_path_with_options(self):
+        registry.register_game('Small Othello', 'MonteCarloGames.othello:Othello', size=6)
+
+        self.assertIn('Small Othello', registry.available_games())
+
+        # The game is only imported when first asked for
+        self.assertEqual(registry._games['Small Othello'], 'MonteCarloGames.othello:Othello')
+        self.assertIs(registry.get_game('Small Othello'), Othello)
+        self.assertIs(registry._games['Small Othello'], Othello)
+
+        self.assertEqual(registry.get_options('Small Othello'), {'size': 6})
+
+        # Changing the options handed out does not change the registered ones
+        registry.get_options('Small Othello')['size'] = 8
+        self.assertEqual(registry.get_options('Small Othello'), {'size': 6})
+
+    def test_register_class(self):
+        registry.register_game('Noughts and Crosses', TicTacToe)
+
+        self.assertIs(registry.get_game('Noughts and Crosses'), TicTacToe)
+        self.assertEqual(registry.get_options('Noughts and Crosses'), {})
+
+    def test_unknown_game(self):
+        with self.assertRaises(KeyError):
+            registry.get_game('Chess')
+
+    def entry_points(self, found):
+        registry._entry_points_loaded = False
+
+        return mock.patch('importlib.metadata.entry_points', return_value=found)
+
+    def test_entry_points(self):
+        found = FoundEntryPoints([
+            importlib.metadata.EntryPoint('Crosses', 'MonteCarloGames.tic_tac_toe:TicTacToe',
+                                          registry.ENTRY_POINT_GROUP),
+            importlib.metadata.EntryPoint('Tic Tac Toe', 'MonteCarloGames.othello:Othello',
+                                          registry.ENTRY_POINT_GROUP),
+            importlib.metadata.EntryPoint('Other', 'MonteCarloGames.othello:Othello',
+                                          'other.group'),
+        ])
+
+        with self.entry_points(found) as entry_points:
+            games = registry.available_games()
+            registry.available_games()
+
+        self.assertEqual(entry_points.call_count, 1)
+
+        self.assertIn('Crosses', games)
+        self.assertNotIn('Other', games)
+        self.assertIs(registry.get_game('Crosses'), TicTacToe)
+
+        # Games registered explicitly take priority
+        self.assertIs(registry.get_game('Tic Tac Toe'), TicTacToe)
+
+    def test_entry_points_before_python_3_10(self):
+        found = {registry.ENTRY_POINT_GROUP: [importlib.metadata.EntryPoint(
+            'Crosses', 'MonteCarloGames.tic_tac_toe:TicTacToe', registry.ENTRY_POINT_GROUP)]}
+
+        with self.entry_points(found):
+            self.assertIs(registry.get_game('Crosses'), TicTacToe)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from MonteCarloGames.self_play import FIELDS, ShardWriter, generate, load_shards
+
+
+def records(count, start=0):
+    '''
+    Returns position records for a game of count positions with recognisable
+    values
+    '''
+
+    values = np.arange(start, start + count)
+
+    return {'boards': np.tile(values[:, None, None] % 3 - 1, (1, 3, 3)).astype(np.int8),
+            'sides': (values % 2).astype(np.int8),
+            'policies': np.tile(values[:, None] / 100, (1, 9)).astype(np.float32),
+            'outcomes': (values % 3 - 1).astype(np.int8)}
+
+
+def games(shards):
+    '''
+    Splits the boards of loaded shards back into games, which all start from
+    the empty Tic-Tac-Toe board
+    '''
+
+    boards = np.concatenate(shards['boards'])
+    starts = np.flatnonzero(~boards.reshape(len(boards), -1).any(axis=1))
+
+    return [boards[start:end].tobytes()
+            for start, end in zip(starts, list(starts[1:]) + [len(boards)])]
+
+
+class TestShards(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_round_trip(self):
+        written = [records(7), records(5, 7), records(11, 12)]
+
+        with ShardWriter(self.directory.name, (3, 3), 9, shard_size=4) as writer:
+            for game in written:
+                writer.write(game)
+
+        self.assertEqual(writer.written, 23)
+
+        shards = load_shards(self.directory.name)
+
+        for field in FIELDS:
+            self.assertEqual([len(shard) for shard in shards[field]], [4] * 5 + [3])
+
+            expected = np.concatenate([game[field] for game in written])
+            np.testing.assert_array_equal(np.concatenate(shards[field]), expected)
+
+            self.assertEqual(shards[field][0].dtype, expected.dtype)
+
+    def test_full_last_shard(self):
+        with ShardWriter(self.directory.name, (3, 3), 9, shard_size=4) as writer:
+            writer.write(records(8))
+
+        shards = load_shards(self.directory.name)
+
+        self.assertEqual([len(shard) for shard in shards['sides']], [4, 4])
+
+    def test_prefixes_are_separate(self):
+        with ShardWriter(self.directory.name, (3, 3), 9, prefix='first') as writer:
+            writer.write(records(3))
+
+        with ShardWriter(self.directory.name, (3, 3), 9, prefix='second') as writer:
+            writer.write(records(5))
+
+        self.assertEqual(len(load_shards(self.directory.name, 'first')['sides'][0]), 3)
+        self.assertEqual(len(load_shards(self.directory.name, 'second')['sides'][0]), 5)
+
+    def test_shorter_run_after_longer_run(self):
+        with ShardWriter(self.directory.name, (3, 3), 9, shard_size=4) as writer:
+            writer.write(records(20))
+
+        with self.assertRaises(FileExistsError):
+            ShardWriter(self.directory.name, (3, 3), 9, shard_size=4)
+
+        # The earlier run is left alone when refusing to write
+        self.assertEqual(sum(map(len, load_shards(self.directory.name)['sides'])), 20)
+
+        with ShardWriter(self.directory.name, (3, 3), 9, shard_size=4,
+                         overwrite=True) as writer:
+            writer.write(records(6, 100))
+
+        shards = load_shards(self.directory.name)
+
+        for field in FIELDS:
+            np.testing.assert_array_equal(np.concatenate(shards[field]),
+                                          records(6, 100)[field])
+
+    def test_overwrite_keeps_other_prefixes(self):
+        with ShardWriter(self.directory.name, (3, 3), 9, prefix='first') as writer:
+            writer.write(records(3))
+
+        with ShardWriter(self.directory.name, (3, 3), 9, prefix='first-b') as writer:
+            writer.write(records(4))
+
+        with ShardWriter(self.directory.name, (3, 3), 9, prefix='first',
+                         overwrite=True) as writer:
+            writer.write(records(2))
+
+        self.assertEqual(len(load_shards(self.directory.name, 'first')['sides']), 1)
+        self.assertEqual(len(load_shards(self.directory.name, 'first')['sides'][0]), 2)
+        self.assertEqual(len(load_shards(self.directory.name, 'first-b')['sides'][0]), 4)
+
+    def test_nothing_written(self):
+        ShardWriter(self.directory.name, (3, 3), 9).close()
+
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+
+class TestGenerate(unittest.TestCase):
+    def generate(self, name, seed):
+        directory = os.path.join(self.directory.name, name)
+        generate('Tic Tac Toe', 8, directory, simulations=20, workers=4, seed=seed)
+
+        return games(load_shards(directory))
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_games_are_not_duplicated_between_workers(self):
+        played = self.generate('unseeded', None)
+
+        self.assertEqual(len(played), 8)
+        self.assertGreater(len(set(played)), 4)
+
+    def test_seed_replays(self):
+        self.assertEqual(self.generate('first', 3), self.generate('second', 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import datetime
+import unittest
+
+from MonteCarloGames.monte_carlo import Node
+from MonteCarloGames.tic_tac_toe import TicTacToe
+from MonteCarloGames.time_manager import TimeManager
+
+
+def searched_node():
+    '''
+    Returns a Tic-Tac-Toe node whose most explored move is not the one with
+    the highest win rate
+    '''
+
+    node = Node(TicTacToe())
+    node.expand()
+
+    explored = node.add_child(4)
+    explored.wins, explored.total = 60, 100
+
+    lucky = node.add_child(0)
+    lucky.wins, lucky.total = 1, 1
+
+    node.total = 101
+
+    return node
+
+
+class TestMoveChoice(unittest.TestCase):
+    def test_win_rate_by_default(self):
+        self.assertEqual(searched_node().get_move(simulations=0), 0)
+
+    def test_by_visits(self):
+        self.assertEqual(searched_node().get_move(simulations=0, by_visits=True), 4)
+
+    def test_time_manager_picks_the_move_it_stops_for(self):
+        node = searched_node()
+        manager = TimeManager(datetime.timedelta(seconds=1))
+
+        # Stop right away: the most explored move cannot be caught up
+        manager.should_stop = lambda *arguments: True
+
+        self.assertEqual(manager.get_move(node), 4)
+
+
+class TestShouldStop(unittest.TestCase):
+    def test_stops_when_runner_up_cannot_catch_up(self):
+        node = searched_node()
+        manager = TimeManager(datetime.timedelta(seconds=10))
+        second = datetime.timedelta(seconds=1)
+
+        self.assertTrue(manager.should_stop(node, 9 * second, 10 * second, 100))
+        self.assertFalse(manager.should_stop(node, second, 10 * second, 20))
+
+    def test_never_stops_before_searching(self):
+        node = searched_node()
+        manager = TimeManager(datetime.timedelta(seconds=10))
+        second = datetime.timedelta(seconds=1)
+
+        self.assertFalse(manager.should_stop(node, second, 10 * second, 0))
+        self.assertFalse(manager.should_stop(node, 0 * second, 10 * second, 100))
+
+
+if __name__ == '__main__':
+    unittest.main()